@@ -0,0 +1,61 @@
+"""Compare per row calls against the batch API.
+
+Run with `python -m benchmarks.batch`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import time
+from typing import Any, Dict, List
+
+from engorgio import engorgio
+from tests import models
+
+ROWS = 20_000
+
+
+@engorgio()
+def get_person(person: models.Person) -> models.Person:
+    """Get a person."""
+    return person
+
+
+def make_rows(size: int) -> List[Dict[str, Any]]:
+    """Create flat person rows."""
+    return [
+        {
+            "person__name": f"person {i}",
+            "person__age": i,
+            "person__hair__length": i % 30,
+            "person__hair__color__r": i % 255,
+            "person__hair__color__g": i % 255,
+            "person__hair__color__b": i % 255,
+            "person__hair__color__alpha__a": 1,
+        }
+        for i in range(size)
+    ]
+
+
+def rows_per_second(run, rows) -> float:
+    """Return rows per second for run."""
+    start = time.perf_counter()
+    run(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Print throughput of each way to call get_person over many rows."""
+    rows = make_rows(ROWS)
+    runs = {
+        "loop": lambda rows: [get_person(**row) for row in rows],
+        "batch": get_person.batch,
+        "batch construct": lambda rows: get_person.batch(rows, construct=True),
+        "pmap": lambda rows: list(get_person.pmap(rows, chunksize=1000)),
+    }
+    for name, run in runs.items():
+        print(f"{name:<16}{rows_per_second(run, rows):>12,.0f} rows/s")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare decoration time of the expansion backends.
+
+Run with `python -m benchmarks.decoration`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import timeit
+
+from engorgio import engorgio
+from tests import models
+
+BACKENDS = ["signature", "exec"]
+
+
+def get_person(person: models.Person) -> models.Person:
+    """Get a person."""
+    return person
+
+
+def get_hero(hero: models.Hero) -> models.Hero:
+    """Get a hero."""
+    return hero
+
+
+def time_decoration(
+    func,
+    *,
+    backend: str,
+    typer: bool,
+    number: int,
+    lazy: bool = False,
+) -> float:
+    """Return the best mean seconds to decorate func."""
+    decorate = engorgio(backend=backend, typer=typer, lazy=lazy)
+    times = timeit.repeat(lambda: decorate(func), number=number, repeat=5)
+    return min(times) / number
+
+
+def main() -> None:
+    """Print decoration time for each backend and model."""
+    print(f"{'function':<12}{'typer':<8}{'backend':<12}{'ms':>10}")  # noqa: T201
+    for func in [get_person, get_hero]:
+        for typer in [False, True]:
+            for backend in BACKENDS:
+                seconds = time_decoration(
+                    func,
+                    backend=backend,
+                    typer=typer,
+                    number=10 if backend == "exec" else 200,
+                )
+                print(  # noqa: T201
+                    f"{func.__name__:<12}{typer!s:<8}{backend:<12}{seconds * 1000:>10.3f}",
+                )
+            seconds = time_decoration(
+                func,
+                backend="signature",
+                typer=typer,
+                number=10_000,
+                lazy=True,
+            )
+            print(  # noqa: T201
+                f"{func.__name__:<12}{typer!s:<8}{'lazy':<12}{seconds * 1000:>10.3f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Measure how flattening and decorating scale with model depth and width.
+
+Run with `python -m benchmarks.scaling`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+
+import timeit
+from functools import partial
+
+from benchmarks.synthetic import make_function, make_model
+from engorgio import engorgio
+from engorgio.schema import flatten_model
+
+DEPTHS = [1, 2, 5, 10]
+WIDTHS = [10, 50, 100, 500]
+
+
+def main() -> None:
+    """Print flatten and decoration time for each depth and width."""
+    print(  # noqa: T201
+        f"{'depth':>6}{'width':>7}{'fields':>8}{'flatten ms':>12}{'decorate ms':>13}",
+    )
+    for depth in DEPTHS:
+        for width in WIDTHS:
+            model = make_model(depth, width)
+            func = make_function(model)
+            flatten = min(timeit.repeat(partial(flatten_model, model), number=3)) / 3
+            decorate = min(timeit.repeat(partial(engorgio(), func), number=1))
+            print(  # noqa: T201
+                f"{depth:>6}{width:>7}{depth * width:>8}"
+                f"{flatten * 1000:>12.3f}{decorate * 1000:>13.3f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
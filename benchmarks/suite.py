@@ -0,0 +1,389 @@
+"""Reproducible benchmark suite for engorgio.
+
+Measures decoration latency, per call overhead against calling the
+undecorated function with a prebuilt model, batch throughput, flattening
+instances against `.dict()` and recursion, peak memory, and typer and click
+`--help` render time, over the `tests/models.py` models and
+generated deep and wide models. Only the standard library is used, so it
+runs offline.
+
+Run with `python -m benchmarks.suite --output report.json`, and compare two
+reports with `python -m benchmarks.suite --compare old.json new.json`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import make_model
+from engorgio import engorgio, flatten
+from engorgio.__about__ import __version__
+from engorgio.schema import schema_cache
+from tests import models
+
+MODELS = {
+    "person": models.Person,
+    "hero": models.Hero,
+    "deep": make_model(10, 10),
+    "wide": make_model(1, 500),
+}
+
+
+def make_handler(model: Any) -> Callable:
+    """Create an undecorated function taking model as `config`."""
+
+    def handler(config: model) -> Any:
+        """Handle a config."""
+        return config
+
+    return handler
+
+
+def make_record(model: Any, prefix: str = "config") -> Dict[str, Any]:
+    """Create a flat record with a valid value for every field of model."""
+    record = {}
+    for field in schema_cache.get(model).fields:
+        value: Any = 1 if field.annotation is int else "x"
+        record[f"{prefix}__{field.name}"] = value
+    return record
+
+
+def measure(run: Callable[[], Any], *, number: int, repeat: int = 5) -> Dict:
+    """Time run, returning seconds per call statistics."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "rounds": repeat,
+        "number": number,
+    }
+
+
+def peak_memory(run: Callable[[], Any]) -> int:
+    """Return the peak bytes allocated while running run."""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_decoration(name: str, model: Any) -> List[Dict]:
+    """Time decorating with each backend, with and without typer."""
+    handler = make_handler(model)
+    results = []
+    for backend, lazy in [("signature", False), ("exec", False), ("signature", True)]:
+        if backend == "exec" and name in ("deep", "wide"):
+            continue
+        for typer in (False, True):
+            decorate = engorgio(backend=backend, typer=typer, lazy=lazy)
+            label = "lazy" if lazy else backend
+            results.append(
+                {
+                    "name": f"decorate[{name}-{label}-typer={typer}]",
+                    "group": "decoration",
+                    "unit": "seconds",
+                    **measure(
+                        partial(decorate, handler),
+                        number=1000 if lazy else 3 if backend == "exec" else 20,
+                    ),
+                },
+            )
+    return results
+
+
+def bench_call(name: str, model: Any) -> List[Dict]:
+    """Time calling the expanded function against the undecorated one.
+
+    Also times passing a ready made instance, as `call[name-instance]`, each
+    `validate` mode, as `call[name-validate=mode]`, and the extra pass over
+    the environment of `env_prefix`, as `call[name-env]`.
+    """
+    handler = make_handler(model)
+    expanded = engorgio()(handler)
+    record = make_record(model)
+    instance = expanded.__engorgio__.plan.condense(record)["config"]
+    number = 200 if name == "wide" else 2000
+    baseline = measure(lambda: handler(config=instance), number=number)
+    call = measure(lambda: expanded(**record), number=number)
+    results = [
+        {
+            "name": f"call[{name}-undecorated]",
+            "group": "call",
+            "unit": "seconds",
+            **baseline,
+        },
+        {"name": f"call[{name}-expanded]", "group": "call", "unit": "seconds", **call},
+        {
+            "name": f"call[{name}-overhead]",
+            "group": "call",
+            "unit": "seconds",
+            "min": call["min"] - baseline["min"],
+            "median": call["median"] - baseline["median"],
+        },
+    ]
+    results.append(
+        {
+            "name": f"call[{name}-instance]",
+            "group": "call",
+            "unit": "seconds",
+            **measure(partial(expanded, config=instance), number=number),
+        },
+    )
+    for validate in ("outer", "none"):
+        validated = engorgio(validate=validate)(handler)
+        results.append(
+            {
+                "name": f"call[{name}-validate={validate}]",
+                "group": "call",
+                "unit": "seconds",
+                **measure(partial(validated, **record), number=number),
+            },
+        )
+    from_env = engorgio(env_prefix="ENGORGIO_BENCH_")(handler)
+    results.append(
+        {
+            "name": f"call[{name}-env]",
+            "group": "call",
+            "unit": "seconds",
+            **measure(partial(from_env, **record), number=number),
+        },
+    )
+    return results
+
+
+def bench_batch(name: str, model: Any, size: int = 1000) -> List[Dict]:
+    """Count records per second through loop, batch, and batch with construct."""
+    expanded = engorgio()(make_handler(model))
+    records = [make_record(model)] * size
+    runs = {
+        "loop": lambda: [expanded(**record) for record in records],
+        "batch": lambda: expanded.batch(records),
+        "construct": lambda: expanded.batch(records, construct=True),
+    }
+    results = []
+    for label, run in runs.items():
+        stats = measure(run, number=1, repeat=3)
+        results.append(
+            {
+                "name": f"batch[{name}-{label}]",
+                "group": "batch",
+                "unit": "records/second",
+                "min": size / stats["median"],
+                "median": size / stats["median"],
+                "max": size / stats["min"],
+            },
+        )
+    return results
+
+
+def flatten_dict(value: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+    """Flatten nested dicts by recursion, the usual way without engorgio."""
+    flat = {}
+    for key, item in value.items():
+        name = f"{prefix}__{key}"
+        if isinstance(item, dict):
+            flat.update(flatten_dict(item, name))
+        else:
+            flat[name] = item
+    return flat
+
+
+def bench_flatten(name: str, model: Any, size: int = 1000) -> List[Dict]:
+    """Count instances per second flattened by flatten and by `.dict()`."""
+    expanded = engorgio()(make_handler(model))
+    instances = [expanded(**make_record(model))] * size
+    runs = {
+        "flatten": lambda: list(flatten(instances, prefix="config")),
+        "dict": lambda: [
+            flatten_dict(instance.dict(), "config") for instance in instances
+        ],
+    }
+    results = []
+    for label, run in runs.items():
+        stats = measure(run, number=1, repeat=3)
+        results.append(
+            {
+                "name": f"flatten[{name}-{label}]",
+                "group": "flatten",
+                "unit": "records/second",
+                "min": size / stats["median"],
+                "median": size / stats["median"],
+                "max": size / stats["min"],
+            },
+        )
+    return results
+
+
+def bench_memory(name: str, model: Any) -> List[Dict]:
+    """Measure peak memory to decorate, and to batch 1000 records."""
+    handler = make_handler(model)
+    expanded = engorgio()(handler)
+    records = [make_record(model)] * 1000
+    return [
+        {
+            "name": f"memory[{name}-decorate]",
+            "group": "memory",
+            "unit": "bytes",
+            "peak": peak_memory(lambda: engorgio()(handler)),
+        },
+        {
+            "name": f"memory[{name}-batch]",
+            "group": "memory",
+            "unit": "bytes",
+            "peak": peak_memory(lambda: expanded.batch(records)),
+        },
+    ]
+
+
+def bench_help(name: str, model: Any) -> List[Dict]:
+    """Time to render `--help` for a typer command."""
+    import typer
+    from typer.testing import CliRunner
+
+    app = typer.Typer()
+    app.command()(engorgio(typer=True)(make_handler(model)))
+    runner = CliRunner()
+    return [
+        {
+            "name": f"help[{name}]",
+            "group": "help",
+            "unit": "seconds",
+            **measure(lambda: runner.invoke(app, ["--help"]), number=3, repeat=3),
+        },
+        *bench_click_help(name, model),
+    ]
+
+
+def bench_click_help(name: str, model: Any) -> List[Dict]:
+    """Time `--help` and completion for a click command from make_command."""
+    from click.testing import CliRunner
+
+    from engorgio.command import make_command
+
+    command = make_command(make_handler(model))
+    runner = CliRunner()
+    complete = {
+        "_HANDLER_COMPLETE": "bash_complete",
+        "COMP_WORDS": "handler --con",
+        "COMP_CWORD": "1",
+    }
+    return [
+        {
+            "name": f"help[{name}-click]",
+            "group": "help",
+            "unit": "seconds",
+            **measure(lambda: runner.invoke(command, ["--help"]), number=3, repeat=3),
+        },
+        {
+            "name": f"complete[{name}-click]",
+            "group": "help",
+            "unit": "seconds",
+            **measure(
+                lambda: runner.invoke(command, [], env=complete, prog_name="handler"),
+                number=3,
+                repeat=3,
+            ),
+        },
+    ]
+
+
+BENCHMARKS = [
+    bench_decoration,
+    bench_call,
+    bench_batch,
+    bench_flatten,
+    bench_memory,
+    bench_help,
+]
+
+
+def run_suite(only: Optional[List[str]] = None) -> Dict:
+    """Run every benchmark group, or only the named groups."""
+    results = []
+    for bench in BENCHMARKS:
+        group = bench.__name__.replace("bench_", "")
+        if only and group not in only:
+            continue
+        for name, model in MODELS.items():
+            results.extend(bench(name, model))
+    return {
+        "engorgio": __version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def headline(result: Dict) -> float:
+    """Get the one number used to compare a result across reports."""
+    return result.get("median", result.get("peak"))
+
+
+def compare(new: Dict, old: Optional[Dict] = None) -> None:
+    """Print each result of new, next to old as a ratio when given."""
+    old_results = {
+        result["name"]: result for result in (old or {"results": []})["results"]
+    }
+    for result in new["results"]:
+        before = old_results.get(result["name"])
+        now = headline(result)
+        if before is None or not headline(before):
+            ratio = ""
+        else:
+            ratio = f"{now / headline(before):>8.2f}x"
+        print(  # noqa: T201
+            f"{result['name']:<40}{now:>14.6g} {result['unit']:<16}{ratio}",
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the suite or compare two reports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, help="write the json report here")
+    parser.add_argument(
+        "--only",
+        action="append",
+        help="run only this group, decoration, call, batch, flatten, memory, or help",
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("OLD", "NEW"),
+        help="compare two json reports instead of running",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old, new = (json.loads(path.read_text()) for path in args.compare)
+        compare(new, old)
+        return
+
+    report = run_suite(args.only)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    compare(report)
+
+
+if __name__ == "__main__":
+    main()
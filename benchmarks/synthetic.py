@@ -0,0 +1,34 @@
+"""Generate deep and wide models for benchmarks.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+from typing import Any
+
+from pydantic import create_model
+
+
+def make_model(depth: int, width: int) -> Any:
+    """Create a model nested depth levels deep with width int fields per level.
+
+    Each level holds width required int fields and, except the innermost, one
+    sub model named `child`.
+    """
+    model = None
+    for level in reversed(range(depth)):
+        fields = {f"field_{i}": (int, ...) for i in range(width)}
+        if model is not None:
+            fields["child"] = (model, ...)
+        model = create_model(f"Level{level}", **fields)
+    return model
+
+
+def make_function(model: Any):
+    """Create a function that takes model as its only argument."""
+
+    def handler(config: model) -> Any:
+        """Handle a config."""
+        return config
+
+    return handler
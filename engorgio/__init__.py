@@ -11,5 +11,6 @@ SPDX-License-Identifier: MIT
 """
 
 from .decorator import engorgio
+from .flat import flatten
 
-__all__ = ["engorgio"]
+__all__ = ["engorgio", "flatten"]
@@ -0,0 +1,12 @@
+"""Run the engorgio command line with `python -m engorgio`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import sys
+
+from engorgio.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""Adapters that teach engorgio to read and build each kind of model.
+
+An adapter lists the fields of a model class, and names the constructor the
+condense plan calls for each validate mode. Pydantic v1 and v2 models,
+dataclasses, attrs classes, and TypedDicts are supported out of the box, more
+can be added with `register_adapter`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import dataclasses
+import inspect
+from typing import (
+    Any,
+    Dict,
+    ForwardRef,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    get_type_hints,
+)
+
+__all__ = [
+    "MISSING",
+    "AdaptedField",
+    "AttrsAdapter",
+    "DataclassAdapter",
+    "ModelAdapter",
+    "PydanticAdapter",
+    "PydanticV2Adapter",
+    "TypedDictAdapter",
+    "get_adapter",
+    "register_adapter",
+    "unregister_adapter",
+]
+
+
+class Missing:
+
+    """Default of arguments a caller can leave out of an expanded function.
+
+    Required fields default to MISSING so a ready made model can be passed
+    instead, each model parameter is a hidden keyword only argument that
+    defaults to MISSING, and fields with a default factory default to
+    MISSING so the model fills them in.
+    """
+
+    def __repr__(self) -> str:
+        """Show as MISSING in signatures and errors."""
+        return "MISSING"
+
+
+MISSING = Missing()
+
+
+class AdaptedField(NamedTuple):
+
+    """A field of a model as seen by its adapter.
+
+    * `annotation`: the resolved type of the field.
+    * `default`: the default used in expanded signatures,
+      `inspect.Parameter.empty` when required, or MISSING when the model
+      fills it in.
+    * `field`: the library's own field object, if it has one.
+    """
+
+    name: str
+    annotation: Any
+    default: Any
+    description: str
+    field: Any
+
+
+class ModelAdapter:
+
+    """Base class of the adapters, override every method."""
+
+    def matches(self, annotation: Any) -> bool:
+        """Check if annotation is a model class this adapter handles."""
+        raise NotImplementedError
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Get the fields of model that are passed to its constructor."""
+        raise NotImplementedError
+
+    def source(self, model: Any) -> Any:
+        """Get the object that changes when the fields of model change."""
+        raise NotImplementedError
+
+    def instance_type(self, model: Any) -> type:
+        """Get the type that instances of model are checked against."""
+        return model
+
+    def constructor(
+        self,
+        validate: str,  # noqa: ARG002
+        *,
+        nested: bool,  # noqa: ARG002
+    ) -> Optional[str]:
+        """Name the method of model that builds it for the validate mode.
+
+        `""` calls the model itself, and None passes the fields on as a dict
+        for the outer model to validate.
+        """
+        return ""
+
+
+def field_annotation(field: Any) -> Any:
+    """Get the annotation of a pydantic field, resolving forward references."""
+    annotation = field.annotation
+    if isinstance(annotation, ForwardRef):
+        return field.outer_type_
+    return annotation
+
+
+def create_default_value(field: Any) -> Any:
+    """Create the default value for pydantic ModelFields as an object.
+
+    Mirrors `engorgio.expand.create_default` without rendering source, except
+    that fields with a `default_factory` default to MISSING.
+    """
+    if not hasattr(field, "required"):
+        # a plain inspect.Parameter
+        if field.default is inspect.Parameter.empty:
+            return inspect.Parameter.empty
+        return str(field.default)
+    if getattr(field, "default_factory", None) is not None:
+        # left for the model to fill in
+        return MISSING
+    if field.default is None and not field.required:
+        return None
+    if field.default is not None:
+        return str(field.default)
+    return inspect.Parameter.empty
+
+
+class PydanticAdapter(ModelAdapter):
+
+    """Pydantic v1 models, validated on construction.
+
+    Also handles `pydantic.v1` models when pydantic v2 is installed.
+    """
+
+    def matches(self, annotation: Any) -> bool:
+        """Check for `__fields__`."""
+        return hasattr(annotation, "__fields__")
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Read `__fields__`."""
+        return tuple(
+            AdaptedField(
+                name=name,
+                annotation=field_annotation(field),
+                default=create_default_value(field),
+                description=field.field_info.description or "",
+                field=field,
+            )
+            for name, field in model.__fields__.items()
+        )
+
+    def source(self, model: Any) -> Any:
+        """Get `__fields__`."""
+        return model.__fields__
+
+    def constructor(self, validate: str, *, nested: bool) -> Optional[str]:
+        """Validate, construct, or leave nested models to the outer model."""
+        if validate == "none":
+            return "construct"
+        if validate == "outer" and nested:
+            return None
+        return ""
+
+
+class PydanticV2Adapter(ModelAdapter):
+
+    """Pydantic v2 models, validated in one pass by pydantic-core.
+
+    Nested models are left as dicts for the outer model to validate whatever
+    the validate mode, except `"none"` which uses `model_construct` at every
+    level.
+    """
+
+    def matches(self, annotation: Any) -> bool:
+        """Check for `model_fields` and `model_validate`."""
+        return (
+            isinstance(annotation, type)
+            and hasattr(annotation, "model_fields")
+            and hasattr(annotation, "model_validate")
+        )
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Read `model_fields`, with their real defaults.
+
+        Factories and unhashable defaults are MISSING, so the model builds or
+        copies them for each instance.
+        """
+        adapted = []
+        for name, field in model.model_fields.items():
+            if field.is_required():
+                default = inspect.Parameter.empty
+            elif field.default_factory is not None or not isinstance(
+                field.default,
+                Hashable,
+            ):
+                default = MISSING
+            else:
+                default = field.default
+            adapted.append(
+                AdaptedField(
+                    name=name,
+                    annotation=field.annotation,
+                    default=default,
+                    description=field.description or "",
+                    field=field,
+                ),
+            )
+        return tuple(adapted)
+
+    def source(self, model: Any) -> Any:
+        """Get `model_fields`."""
+        return model.model_fields
+
+    def constructor(self, validate: str, *, nested: bool) -> Optional[str]:
+        """Validate once at the outer model, or construct every level."""
+        if validate == "none":
+            return "model_construct"
+        if nested:
+            return None
+        return ""
+
+
+def resolve_hints(model: Any) -> Dict[str, Any]:
+    """Get the type hints of model, keeping raw annotations that fail to resolve."""
+    try:
+        return get_type_hints(model)
+    except (NameError, TypeError):
+        return dict(getattr(model, "__annotations__", {}))
+
+
+class DataclassAdapter(ModelAdapter):
+
+    """Stdlib dataclasses, including `slots=True` and frozen ones."""
+
+    def matches(self, annotation: Any) -> bool:
+        """Check for a dataclass class."""
+        return isinstance(annotation, type) and dataclasses.is_dataclass(annotation)
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Read `dataclasses.fields`, skipping `init=False` fields."""
+        hints = resolve_hints(model)
+        adapted = []
+        for field in dataclasses.fields(model):
+            if not field.init:
+                continue
+            if field.default is not dataclasses.MISSING:
+                default = field.default
+            elif field.default_factory is not dataclasses.MISSING:
+                default = MISSING
+            else:
+                default = inspect.Parameter.empty
+            adapted.append(
+                AdaptedField(
+                    name=field.name,
+                    annotation=hints.get(field.name, field.type),
+                    default=default,
+                    description=field.metadata.get("description", ""),
+                    field=field,
+                ),
+            )
+        return tuple(adapted)
+
+    def source(self, model: Any) -> Any:
+        """Get `__dataclass_fields__`."""
+        return model.__dataclass_fields__
+
+
+class AttrsAdapter(ModelAdapter):
+
+    """attrs classes, built through their generated `__init__`."""
+
+    def matches(self, annotation: Any) -> bool:
+        """Check for `__attrs_attrs__`."""
+        return isinstance(annotation, type) and hasattr(annotation, "__attrs_attrs__")
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Read `__attrs_attrs__`, skipping `init=False` attributes."""
+        import attr
+
+        hints = resolve_hints(model)
+        adapted = []
+        for field in model.__attrs_attrs__:
+            if not field.init:
+                continue
+            if isinstance(field.default, attr.Factory):
+                default = MISSING
+            elif field.default is attr.NOTHING:
+                default = inspect.Parameter.empty
+            else:
+                default = field.default
+            adapted.append(
+                AdaptedField(
+                    # attrs strips leading underscores from __init__ arguments
+                    name=getattr(field, "alias", None) or field.name.lstrip("_"),
+                    annotation=hints.get(field.name, field.type),
+                    default=default,
+                    description=field.metadata.get("description", ""),
+                    field=field,
+                ),
+            )
+        return tuple(adapted)
+
+    def source(self, model: Any) -> Any:
+        """Get `__attrs_attrs__`."""
+        return model.__attrs_attrs__
+
+
+class TypedDictAdapter(ModelAdapter):
+
+    """TypedDicts, built as plain dicts with no checks."""
+
+    def matches(self, annotation: Any) -> bool:
+        """Check for a dict subclass with `__total__`."""
+        return (
+            isinstance(annotation, type)
+            and issubclass(annotation, dict)
+            and hasattr(annotation, "__total__")
+        )
+
+    def fields(self, model: Any) -> Tuple[AdaptedField, ...]:
+        """Read the annotations, keys that are not required default to MISSING."""
+        required = getattr(
+            model,
+            "__required_keys__",
+            model.__annotations__ if model.__total__ else (),
+        )
+        return tuple(
+            AdaptedField(
+                name=name,
+                annotation=annotation,
+                default=inspect.Parameter.empty if name in required else MISSING,
+                description="",
+                field=None,
+            )
+            for name, annotation in resolve_hints(model).items()
+        )
+
+    def source(self, model: Any) -> Any:
+        """Get `__annotations__`."""
+        return model.__annotations__
+
+    def instance_type(self, model: Any) -> type:  # noqa: ARG002
+        """TypedDicts cannot be used with isinstance, check for a dict."""
+        return dict
+
+
+# v2 first, v2 models still have a deprecated `__fields__`
+ADAPTERS: List[ModelAdapter] = [
+    PydanticV2Adapter(),
+    PydanticAdapter(),
+    DataclassAdapter(),
+    AttrsAdapter(),
+    TypedDictAdapter(),
+]
+_by_type: Dict[Any, Optional[ModelAdapter]] = {}
+MAX_CACHED_TYPES = 4096
+
+
+def register_adapter(adapter: ModelAdapter) -> None:
+    """Add adapter, it is tried before every adapter already registered."""
+    ADAPTERS.insert(0, adapter)
+    _by_type.clear()
+
+
+def unregister_adapter(adapter: ModelAdapter) -> None:
+    """Remove an adapter added with register_adapter."""
+    ADAPTERS.remove(adapter)
+    _by_type.clear()
+
+
+def get_adapter(annotation: Any) -> Optional[ModelAdapter]:
+    """Get the adapter that handles annotation, or None if it is not a model."""
+    try:
+        return _by_type[annotation]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable annotations are never models
+        return None
+    adapter = next(
+        (adapter for adapter in ADAPTERS if adapter.matches(annotation)),
+        None,
+    )
+    if len(_by_type) >= MAX_CACHED_TYPES:
+        _by_type.clear()
+    _by_type[annotation] = adapter
+    return adapter
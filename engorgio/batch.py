@@ -0,0 +1,208 @@
+"""Call engorgio functions over many flat records at once.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import importlib
+import itertools
+import os
+from collections import deque
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from engorgio.hooks import HOOKS, acall_timed, call_timed, function_name
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from engorgio.decorator import Expansion
+
+
+def condense_records(
+    expansion: "Expansion",
+    records: Iterable[Dict[str, Any]],
+    *,
+    construct: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily condense flat records as the expanded function condenses kwargs.
+
+    Each record is copied and filled from the config file and environment
+    first, as `expansion.condense` would, then handed to
+    `CondensePlan.condense_many` so records with the same keys still share
+    one compiled row.
+    """
+    merge = expansion.merge
+    if merge is not None:
+        records = (merge(dict(record)) for record in records)
+    return expansion.plan.condense_many(records, construct=construct)
+
+
+def make_map(expansion: "Expansion") -> Callable[..., Iterator[Any]]:
+    """Create the `.map` method of an expanded function."""
+
+    def map_records(
+        records: Iterable[Dict[str, Any]],
+        *,
+        construct: bool = False,
+    ) -> Iterator[Any]:
+        """Lazily call func with each flat record.
+
+        Records use the same flat names as the expanded function. Records
+        with the same keys share one compiled function that builds their
+        models, see `CondensePlan.condense_many`, and `construct=True` skips
+        validation for records that are already trusted.
+        """
+        if HOOKS:
+            for record in records:
+                kwargs = record if merge is None else merge(dict(record))
+                yield call_timed(name, func, plan, (), kwargs, construct=construct)
+            return
+        for kwargs in condense_records(expansion, records, construct=construct):
+            yield func(**kwargs)
+
+    func, plan, merge = expansion.func, expansion.plan, expansion.merge
+    name = function_name(func)
+    return map_records
+
+
+def make_batch(expansion: "Expansion") -> Callable[..., List[Any]]:
+    """Create the `.batch` method of an expanded function."""
+    map_records = make_map(expansion)
+
+    def batch_records(
+        records: Iterable[Dict[str, Any]],
+        *,
+        construct: bool = False,
+    ) -> List[Any]:
+        """Call func with each flat record and return the results as a list."""
+        return list(map_records(records, construct=construct))
+
+    return batch_records
+
+
+def make_amap(expansion: "Expansion") -> Callable[..., Awaitable[List[Any]]]:
+    """Create the `.amap` method of an expanded coroutine function."""
+
+    async def amap_records(
+        records: Iterable[Dict[str, Any]],
+        *,
+        concurrency: int = 100,
+        construct: bool = False,
+    ) -> List[Any]:
+        """Await func with each flat record, at most concurrency at a time.
+
+        Records are condensed inline on the event loop, results are returned
+        in order.
+        """
+        import asyncio
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(record: Dict[str, Any]) -> Any:
+            async with semaphore:
+                if HOOKS:
+                    return await acall_timed(
+                        name,
+                        func,
+                        plan,
+                        (),
+                        record if merge is None else merge(dict(record)),
+                        construct=construct,
+                    )
+                return await func(**condense(dict(record), construct=construct))
+
+        return await asyncio.gather(*(call(record) for record in records))
+
+    func, plan, merge = expansion.func, expansion.plan, expansion.merge
+    condense = expansion.condense
+    name = function_name(func)
+    return amap_records
+
+
+@lru_cache(maxsize=256)
+def resolve_expansion(module: str, qualname: str) -> Any:
+    """Import the decorated function at module.qualname and get its Expansion.
+
+    Cached, so each worker process imports and expands the function once.
+    """
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj.__engorgio__
+
+
+def run_chunk(
+    module: str,
+    qualname: str,
+    records: List[Dict[str, Any]],
+    construct: bool,  # noqa: FBT001
+) -> List[Any]:
+    """Call the decorated function at module.qualname with each record."""
+    expansion = resolve_expansion(module, qualname)
+    func = expansion.func
+    return [
+        func(**kwargs)
+        for kwargs in condense_records(expansion, records, construct=construct)
+    ]
+
+
+def make_pmap(func: Callable) -> Callable[..., Iterator[Any]]:
+    """Create the `.pmap` method of an expanded function."""
+
+    def pmap_records(
+        records: Iterable[Dict[str, Any]],
+        *,
+        workers: Optional[int] = None,
+        chunksize: int = 256,
+        construct: bool = False,
+    ) -> Iterator[Any]:
+        """Lazily call func with each flat record across a process pool.
+
+        Only the module and qualname of the decorated function are sent to
+        the workers, each worker imports it and compiles its plan once.
+        Records are sent chunksize at a time, at most two chunks per worker
+        are in flight, and results come back in order.
+
+        func must be decorated at the top level of an importable module.
+        """
+        module, qualname = func.__module__, func.__qualname__
+        try:
+            found = resolve_expansion(module, qualname).func is func
+        except AttributeError:
+            found = False
+        if not found:
+            msg = (
+                f"{qualname} cannot be sent to worker processes, pmap needs a "
+                "function decorated at the top level of a module"
+            )
+            raise TypeError(msg)
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = workers or os.cpu_count() or 1
+        max_pending = 2 * workers
+        records = iter(records)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future] = deque()
+            for chunk in iter(lambda: list(itertools.islice(records, chunksize)), []):
+                pending.append(
+                    pool.submit(run_chunk, module, qualname, chunk, construct),
+                )
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    return pmap_records
@@ -0,0 +1,63 @@
+"""The engorgio command line.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from engorgio.codegen import check, generate
+
+
+def compile_command(args: argparse.Namespace) -> int:
+    """Write, print, or check the pre-expanded module."""
+    if args.check:
+        if args.output is None:
+            sys.stderr.write("--check needs --output\n")
+            return 2
+        if not check(args.module, args.output):
+            sys.stderr.write(
+                f"{args.output} is out of date, "
+                f"run `engorgio compile {args.module} -o {args.output}`\n",
+            )
+            return 1
+        return 0
+
+    source = generate(args.module)
+    if args.output is None:
+        sys.stdout.write(source)
+    else:
+        args.output.write_text(source)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the engorgio command line."""
+    parser = argparse.ArgumentParser(prog="engorgio")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = commands.add_parser(
+        "compile",
+        help="generate static, pre-expanded wrappers for a module",
+    )
+    compile_parser.add_argument("module", help="dotted name of the module")
+    compile_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="file to write, prints to stdout when left out",
+    )
+    compile_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit 1 if --output is not up to date instead of writing it",
+    )
+    compile_parser.set_defaults(run=compile_command)
+
+    args = parser.parse_args(argv)
+    if str(Path.cwd()) not in sys.path:
+        sys.path.insert(0, str(Path.cwd()))
+    return args.run(args)
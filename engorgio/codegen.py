@@ -0,0 +1,287 @@
+"""Generate static, pre-expanded wrappers as a python module.
+
+`engorgio compile <module>` imports module, finds its engorgio functions, and
+writes plain functions with explicit signatures, typer options, and straight
+line model construction, so production code can import them with no
+reflection at all. Decorate the source functions with `lazy=True` so
+importing them stays free too.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import importlib
+import inspect
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from engorgio.adapters import MISSING, get_adapter
+from engorgio.expand import get_flat_fields
+from engorgio.lazy import LazyFunction
+from engorgio.schema import (
+    FieldSchema,
+    is_optional_model,
+    model_type,
+    schema_cache,
+)
+
+HEADER = '''"""Expanded functions for {module}.
+
+Generated by `engorgio compile {module}`, do not edit.
+"""
+'''
+
+
+def original(func: Any) -> Callable:
+    """Get the undecorated function behind an engorgio function."""
+    if isinstance(func, LazyFunction):
+        return func.func
+    return func.__engorgio__.func
+
+
+def find_functions(module: Any) -> Dict[str, Any]:
+    """Find the engorgio functions defined in module."""
+    return {
+        name: value
+        for name, value in vars(module).items()
+        if getattr(value, "__module__", None) == module.__name__
+        and (isinstance(value, LazyFunction) or hasattr(value, "__engorgio__"))
+    }
+
+
+def render_annotation(annotation: Any, imports: Set[str]) -> str:
+    """Render annotation as source, adding the modules it needs to imports."""
+    if isinstance(annotation, type):
+        if annotation.__module__ == "builtins":
+            return annotation.__qualname__
+        imports.add(annotation.__module__)
+        return f"{annotation.__module__}.{annotation.__qualname__}"
+    text = repr(annotation)
+    for token in re.findall(r"[A-Za-z_][\w.]*", text):
+        parts = token.split(".")
+        for end in range(len(parts) - 1, 0, -1):
+            module = ".".join(parts[:end])
+            if module in sys.modules:
+                imports.add(module)
+                break
+    return text
+
+
+def render_default(
+    field: FieldSchema,
+    panel: str,
+    imports: Set[str],
+    *,
+    typer: bool,
+) -> str:
+    """Render the default of a flat field, mirroring make_parameter."""
+    if field.default is MISSING and (not typer or field.description is None):
+        imports.add("engorgio.adapters")
+        return "engorgio.adapters.MISSING"
+    if not typer or field.description is None:
+        return repr(field.default)
+    if field.default is MISSING:
+        return (
+            f"typer.Option(None, help={field.description!r}, "
+            f"rich_help_panel={panel!r})"
+        )
+    if field.default is inspect.Parameter.empty:
+        return (
+            f"typer.Option(..., help={field.description!r}, "
+            f"rich_help_panel={panel!r}, prompt=True)"
+        )
+    return (
+        f"typer.Option({field.default!r}, help={field.description!r}, "
+        f"rich_help_panel={panel!r})"
+    )
+
+
+def render_docstring(doc: str) -> str:
+    """Render doc as a docstring literal."""
+    if '"""' in doc or "\\" in doc or doc.endswith('"'):
+        return repr(doc)
+    return f'"""{doc}"""'
+
+
+def render_model(  # noqa: PLR0913
+    model: Any,
+    path: Tuple[str, ...],
+    flat_names: Dict[Tuple[str, ...], str],
+    imports: Set[str],
+    indent: str,
+    *,
+    validate: str = "full",
+    typer: bool = False,
+) -> str:
+    """Render the straight line construction of model from flat names.
+
+    Fields the model fills in are only passed when set, with typer their
+    options are None when left out.
+    """
+    adapter = get_adapter(model)
+    constructor = adapter.constructor(validate, nested=bool(path))
+    if constructor is None:
+        lines = ["dict("]
+    elif constructor:
+        lines = [f"{render_annotation(model, imports)}.{constructor}("]
+    else:
+        lines = [f"{render_annotation(model, imports)}("]
+    schema = schema_cache.get(model)
+    for field in schema.fields:
+        if len(field.path) > 1:
+            continue
+        name = field.path[0]
+        value = flat_names[(*path, name)]
+        if field.default is MISSING or (
+            validate == "none" and field.default is not inspect.Parameter.empty
+        ):
+            # left for the model to fill in
+            imports.add("engorgio.adapters")
+            unset = f"{value} is engorgio.adapters.MISSING"
+            if typer:
+                unset = f"{value} is None or {unset}"
+            lines.append(
+                f"{indent}    **({{}} if {unset} else {{{name!r}: {value}}}),",
+            )
+        else:
+            lines.append(f"{indent}    {name}={value},")
+    for sub_path, sub_model in reversed(schema.models):
+        if len(sub_path) == 1:
+            value = render_model(
+                sub_model,
+                (*path, *sub_path),
+                flat_names,
+                imports,
+                indent + "    ",
+                validate=validate,
+                typer=typer,
+            )
+            lines.append(f"{indent}    {sub_path[0]}={value},")
+    lines.append(f"{indent})")
+    return "\n".join(lines)
+
+
+def render_function(name: str, func: Any, imports: Set[str]) -> str:
+    """Render the pre-expanded source of one engorgio function."""
+    source = original(func)
+    expansion = func.__engorgio__
+    if expansion.config_option or expansion.env_prefix is not None:
+        msg = (
+            f"cannot compile {name}, it reads a config file or environment "
+            "variables, leave it to the decorator"
+        )
+        raise ValueError(msg)
+    separator = expansion.model_separator
+    flat_fields = get_flat_fields(
+        source,
+        separator,
+        include_parent_model=expansion.include_parent_model,
+    )
+
+    params: List[str] = []
+    defaulted: List[str] = []
+    for flat_name, field in flat_fields.items():
+        annotation = ""
+        if field.annotation is not inspect.Parameter.empty:
+            annotation = f": {render_annotation(field.annotation, imports)}"
+        if field.default is inspect.Parameter.empty and (
+            not expansion.typer or field.description is None
+        ):
+            params.append(f"    {flat_name}{annotation},")
+            continue
+        panel = "--".join(flat_name.split(separator)[:-1])
+        if (
+            expansion.validate == "none"
+            and not expansion.typer
+            and field.description is not None
+        ):
+            # Model.construct fills in the model's own defaults, the rendered
+            # signature default would be passed as it is
+            field = field._replace(default=MISSING)  # noqa: PLW2901
+        default = render_default(field, panel, imports, typer=expansion.typer)
+        if default.startswith("typer."):
+            imports.add("typer")
+        defaulted.append(f"    {flat_name}{annotation} = {default},")
+
+    call_args = []
+    for arg_name, param in inspect.signature(source).parameters.items():
+        model = model_type(param.annotation)
+        if model is None:
+            call_args.append(f"        {arg_name}={arg_name},")
+            continue
+        if is_optional_model(param):
+            msg = (
+                f"cannot compile {name}, {arg_name} is an Optional model that "
+                "defaults to None, leave it to the decorator"
+            )
+            raise ValueError(msg)
+        flat_names = {}
+        for flat_name, field in flat_fields.items():
+            if field.description is None:
+                continue
+            prefix = (arg_name,) if expansion.include_parent_model else ()
+            if flat_name.split(separator)[: len(prefix)] == list(prefix):
+                flat_names[field.path] = flat_name
+        rendered = render_model(
+            model,
+            (),
+            flat_names,
+            imports,
+            "        ",
+            validate=expansion.validate,
+            typer=expansion.typer,
+        )
+        call_args.append(f"        {arg_name}={rendered},")
+
+    is_async = inspect.iscoroutinefunction(source)
+    lines = [
+        f"_{name} = original(_source.{name})",
+        "",
+        "",
+        f"{'async ' if is_async else ''}def {name}(",
+        *params,
+        *defaulted,
+    ]
+    lines.append("):")
+    if source.__doc__:
+        lines.append(f"    {render_docstring(source.__doc__)}")
+    lines.append(f"    return {'await ' if is_async else ''}_{name}(")
+    lines.extend(call_args)
+    lines.append("    )")
+    return "\n".join(lines)
+
+
+def generate(module_name: str) -> str:
+    """Generate the source of the pre-expanded module for module_name."""
+    module = importlib.import_module(module_name)
+    imports: Set[str] = set()
+    functions = [
+        render_function(name, func, imports)
+        for name, func in find_functions(module).items()
+    ]
+    # models defined in module itself are rendered as module.Model, so the
+    # module is imported by name as well as `_source`
+    import_lines = [f"import {name}" for name in sorted(imports)]
+    return "\n".join(
+        [
+            HEADER.format(module=module_name),
+            *import_lines,
+            "",
+            f"import {module_name} as _source",
+            "from engorgio.codegen import original",
+            "",
+            "",
+            "\n\n\n".join(functions),
+            "",
+        ],
+    )
+
+
+def check(module_name: str, path: Path) -> bool:
+    """Check that the generated module at path is up to date."""
+    try:
+        return path.read_text() == generate(module_name)
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,261 @@
+"""Build click commands for expanded functions without going through typer.
+
+The click options of each model are built straight from its cached schema,
+once per model, separator, and prefix, so creating a command, rendering
+`--help`, or completing a flag never re-reads the model. Typer builds and
+renders every option and rich help panel on each invocation.
+
+Commands with many options show each panel as a one line summary in
+`--help`, `--help-panel NAME` renders the named panels, or `all` of them.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+
+import enum
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import click
+
+from engorgio.adapters import MISSING
+from engorgio.config import CONFIG_OPTION
+from engorgio.decorator import engorgio
+from engorgio.env import env_name
+from engorgio.schema import (
+    FieldSchema,
+    ModelSchema,
+    is_optional_model,
+    model_type,
+    parameter_schema,
+    schema_cache,
+)
+
+__all__ = [
+    "EngorgioCommand",
+    "make_command",
+    "model_options",
+]
+
+# commands with more options than this collapse their panels in `--help`
+MAX_EAGER_OPTIONS = 40
+MAX_CACHED_MODELS = 512
+
+_options: Dict[
+    Tuple[Any, str, Optional[str], bool, Optional[str]],
+    Tuple[ModelSchema, Tuple[click.Option, ...]],
+] = {}
+
+
+def click_type(annotation: Any) -> Any:
+    """Get the click type of annotation, text for anything click cannot parse."""
+    if getattr(annotation, "__origin__", None) is Union:
+        args = [arg for arg in annotation.__args__ if arg is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+    if annotation in (str, int, float, bool):
+        return click.types.convert_type(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return click.Choice([member.value for member in annotation])
+    return click.STRING
+
+
+def make_option(
+    name: str,
+    field: FieldSchema,
+    panel: str,
+    envvar: Optional[str] = None,
+) -> click.Option:
+    """Create the click.Option for the flat argument name."""
+    flag = f"--{name.replace('_', '-')}"
+    option_type = click_type(field.annotation)
+    if option_type is click.BOOL:
+        flag = f"{flag}/--no-{flag[2:]}"
+    required = field.default is inspect.Parameter.empty
+    # newer click treats an explicit default of None as set, leave it out
+    default = {}
+    if not required and field.default is not MISSING:
+        default = {"default": field.default, "show_default": field.default is not None}
+    option = click.Option(
+        [name, flag],
+        type=option_type,
+        required=required,
+        help=field.description or None,
+        envvar=envvar,
+        show_envvar=envvar is not None,
+        **default,
+    )
+    option.panel = panel  # type: ignore[attr-defined]
+    return option
+
+
+def panel_name(name: str, model_separator: str = "__") -> str:
+    """Name the help panel of the flat argument name, as typer panels are named."""
+    return "--".join(name.split(model_separator)[:-1])
+
+
+def model_options(
+    model: Any,
+    model_separator: str = "__",
+    prefix: Optional[str] = None,
+    *,
+    config_option: bool = False,
+    env_prefix: Optional[str] = None,
+) -> Tuple[click.Option, ...]:
+    """Get the click options for every leaf field of model.
+
+    Names are prefixed with `{prefix}{model_separator}`, or are the bare field
+    names when prefix is None. With config_option no option is required or
+    has a default, the config file fills them in. With env_prefix each option
+    reads its environment variable. Cached until the model's schema is
+    rebuilt.
+    """
+    key = (model, model_separator, prefix, config_option, env_prefix)
+    schema = schema_cache.get(model, model_separator)
+    cached = _options.get(key)
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+
+    options = []
+    for field in schema.fields:
+        if prefix is None:
+            name = field.path[-1]
+            panel = field.panel
+        else:
+            name = f"{prefix}{model_separator}{field.name}"
+            panel = panel_name(name, model_separator)
+        if config_option:
+            field = field._replace(default=MISSING)  # noqa: PLW2901
+        envvar = None if env_prefix is None else env_name(env_prefix, name)
+        options.append(make_option(name, field, panel, envvar))
+    cached = (schema, tuple(options))
+    if len(_options) >= MAX_CACHED_MODELS:
+        _options.clear()
+    _options[key] = cached
+    return cached[1]
+
+
+def show_panels(ctx: click.Context, _param: click.Parameter, value: Any) -> None:
+    """Print help with the named panels rendered, then exit."""
+    if not value or ctx.resilient_parsing:
+        return
+    ctx.meta["engorgio.panels"] = set(value)
+    click.echo(ctx.get_help(), color=ctx.color)
+    ctx.exit()
+
+
+class EngorgioCommand(click.Command):
+
+    """A click.Command that groups options into panels.
+
+    With lazy_panels each panel is listed by name and option count, and only
+    rendered when asked for with `--help-panel`.
+    """
+
+    def __init__(self, *args: Any, lazy_panels: bool = False, **kwargs: Any) -> None:
+        """Create the command, adding `--help-panel` when lazy_panels."""
+        super().__init__(*args, **kwargs)
+        self.lazy_panels = lazy_panels
+        if lazy_panels:
+            self.params.append(
+                click.Option(
+                    ["--help-panel"],
+                    multiple=True,
+                    is_eager=True,
+                    expose_value=False,
+                    callback=show_panels,
+                    help="Show the options of a panel, or all panels, and exit.",
+                ),
+            )
+
+    def format_options(self, ctx: click.Context, formatter: Any) -> None:
+        """Write the ungrouped options, then each panel or its summary."""
+        panels: Dict[str, List[click.Parameter]] = {"": []}
+        for param in self.get_params(ctx):
+            panels.setdefault(getattr(param, "panel", ""), []).append(param)
+        shown = ctx.meta.get("engorgio.panels", set())
+
+        summary = []
+        for panel, params in panels.items():
+            if panel and self.lazy_panels and not shown & {panel, "all"}:
+                plural = "" if len(params) == 1 else "s"
+                summary.append((panel, f"{len(params)} option{plural}"))
+                continue
+            records = [
+                record
+                for record in (param.get_help_record(ctx) for param in params)
+                if record is not None
+            ]
+            if records:
+                with formatter.section(panel or "Options"):
+                    formatter.write_dl(records)
+        if summary:
+            with formatter.section("Panels, show with --help-panel NAME or all"):
+                formatter.write_dl(summary)
+
+
+def make_command(
+    func: Callable,
+    *,
+    name: Optional[str] = None,
+    lazy_panels: Optional[bool] = None,
+) -> EngorgioCommand:
+    """Create a click command that calls func with its expanded arguments.
+
+    func is expanded with the default `engorgio()` unless it already was.
+    lazy_panels defaults to collapsing panels past MAX_EAGER_OPTIONS options.
+    """
+    expansion = getattr(func, "__engorgio__", None)
+    if expansion is None:
+        func = engorgio()(func)
+        expansion = func.__engorgio__
+    model_separator = expansion.model_separator
+    include_parent_model = expansion.include_parent_model
+
+    params: List[click.Parameter] = []
+    for arg, param in inspect.signature(expansion.func).parameters.items():
+        model = model_type(param.annotation)
+        if model is not None:
+            prefix = arg if include_parent_model else None
+            params.extend(
+                model_options(
+                    model,
+                    model_separator,
+                    prefix,
+                    # no field of an optional model is required either
+                    config_option=(
+                        expansion.config_option or is_optional_model(param)
+                    ),
+                    env_prefix=expansion.env_prefix,
+                ),
+            )
+        else:
+            # the real default, not the str() one used in generated signatures
+            default = MISSING if expansion.config_option else param.default
+            field = parameter_schema(param)._replace(default=default)
+            params.append(make_option(arg, field, ""))
+    if expansion.config_option:
+        params.append(
+            click.Option(
+                [CONFIG_OPTION, "--config-file"],
+                type=click.Path(exists=True, dir_okay=False),
+                help="YAML, TOML, or JSON file to read arguments from.",
+            ),
+        )
+    if lazy_panels is None:
+        lazy_panels = len(params) > MAX_EAGER_OPTIONS
+
+    def callback(**kwargs: Any) -> Any:
+        # unset options fall back to the expanded function's own defaults
+        return func(
+            **{key: value for key, value in kwargs.items() if value is not None},
+        )
+
+    return EngorgioCommand(
+        name or expansion.func.__name__.replace("_", "-"),
+        params=params,
+        callback=callback,
+        help=inspect.getdoc(expansion.func),
+        lazy_panels=lazy_panels,
+    )
@@ -5,56 +5,434 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 SPDX-License-Identifier: MIT
 """
 import inspect
-from typing import Any, Callable, Dict, Optional
+import keyword
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from engorgio.adapters import MISSING, get_adapter
+from engorgio.schema import (
+    field_annotation,
+    is_optional_model,
+    model_type,
+    schema_cache,
+)
 
 
 def get_kwargs_for_param(
-    param: inspect.Parameter,
+    param: Any,
     kwargs: Dict,
     model_separator: str = "__",
+    prefix: Optional[str] = None,
 ):
-    """Get kwargs for the param from the dict of kwargs."""
-    min_kwargs = 2
-    model_kwargs = {k: v for k, v in kwargs.items() if len(k.split("__")) >= min_kwargs}
+    """Get kwargs for the param from the dict of kwargs.
+
+    Looks up the flat name of each direct field of the param's model,
+    `{prefix}{model_separator}{field}`, prefix defaulting to `param.name`.
+    """
+    index = field_index(
+        param.name if prefix is None else prefix,
+        model_type(field_annotation(param)),
+        model_separator,
+    )
     return {
-        k.split(model_separator)[-1]: v
-        for k, v in model_kwargs.items()
-        if k.split(model_separator)[-2] == param.name
+        field_name: kwargs[flat_name]
+        for flat_name, field_name in index
+        if flat_name in kwargs
     }
 
 
-def expand_param(
-    param: inspect.Parameter,
+def field_index(
+    prefix: str,
+    model: Any,
+    model_separator: str = "__",
+) -> Tuple[Tuple[str, str], ...]:
+    """Get `(flat name, field name)` of each direct field of model that is not a model."""
+    return tuple(
+        (f"{prefix}{model_separator}{field.name}", field.name)
+        for field in schema_cache.get(model, model_separator).fields
+        if len(field.path) == 1
+    )
+
+
+def expand_param(  # noqa: PLR0913
+    param: Any,
     kwargs: Dict[str, Any],
-    models: Optional[Dict[str, str]] = None,
+    models: Optional[Dict[str, Any]] = None,
     model_separator: str = "__",
     *,
     include_parent_model: bool = True,
+    prefix: Optional[str] = None,
 ) -> Any:
-    """Further expands params with a Pydantic annotation, given a param.
+    """Further expands params with a model annotation, given a param.
+
+    Creates an instance of any param.annotation that is a model, building
+    each of its sub models first. models holds instances to use for direct
+    fields of the same name instead of building them.
+    """
+    model = model_type(field_annotation(param))
+    if prefix is None:
+        prefix = param.name
+    # raises RecursiveModelError for models that contain themselves
+    schema = schema_cache.get(model, model_separator)
+
+    children: Dict[Tuple[str, ...], Dict[str, Any]] = {(): dict(models or {})}
+    for path, node_model in schema.models:
+        if path and path[0] in children[()]:
+            continue
+        if include_parent_model:
+            node_kwargs = {
+                field_name: kwargs[flat_name]
+                for flat_name, field_name in field_index(
+                    model_separator.join((prefix, *path)),
+                    node_model,
+                    model_separator,
+                )
+                if flat_name in kwargs
+            }
+        else:
+            node_kwargs = kwargs
+        instance = node_model(**{**node_kwargs, **children.pop(path, {})})
+        if path:
+            children.setdefault(path[:-1], {})[path[-1]] = instance
+    return instance
+
+
+VALIDATE = ("full", "outer", "none")
+MAX_CACHED_ROWS = 64
+
+
+class CondensePlan(NamedTuple):
 
-    Recursively creates an instance of any param.annotation that has __fields__
+    """Precomputed instructions for condensing flat kwargs into models.
+
+    Built once per decorated function by `make_condense_plan`, so each call is
+    a single pass over the kwargs with no signature inspection or string
+    splitting.
+
+    * `params`: names the func accepts directly.
+    * `slots`: flat kwarg name -> tuple of `(node, field_name)` targets.
+    * `nodes`: `(model, parent, field_name)` in post-order, `parent` is the
+      index of the parent node or `-1` for a func parameter.
+    * `builders`: for each validate mode, the callable that builds each node
+      from its fields, None to leave the fields as a dict.
+    * `roots`: `(param_name, accepts, start, stop)`, the slice of `nodes` that
+      builds each model parameter, unless the caller passed an instance of
+      the `accepts` types.
+    * `required`: flat names that must be passed unless their model is.
+    * `optional`: model parameters that are None unless one of their fields
+      is set, see `is_optional_model`.
+    * `rows`: the functions `condense_many` compiled for each set of keys.
+    * `validate`: one of `VALIDATE`, see `engorgio`.
     """
-    if models is None:
-        models = {}
-
-    for field_name, field in param.annotation.__fields__.items():
-        if hasattr(field.annotation, "__fields__"):
-            models[field_name] = expand_param(
-                param=field,
-                kwargs=kwargs,
-                models=models,
-                include_parent_model=include_parent_model,
+
+    params: FrozenSet[str]
+    slots: Dict[str, Tuple[Tuple[int, str], ...]]
+    nodes: Tuple[Tuple[Any, int, str], ...]
+    roots: Tuple[Tuple[str, Tuple[type, ...], int, int], ...]
+    builders: Dict[str, Tuple[Optional[Callable], ...]]
+    required: FrozenSet[str]
+    optional: FrozenSet[str]
+    rows: Dict[Tuple[Tuple[str, ...], bool], Optional[Callable]]
+    validate: str = "full"
+
+    def condense(
+        self,
+        kwargs: Dict[str, Any],
+        *,
+        construct: bool = False,
+    ) -> Dict[str, Any]:
+        """Condense expanded kwargs back to model instances.
+
+        `construct=True` builds models as `validate="none"` does, skipping
+        validation for data that is already trusted, whatever the plan's
+        `validate` is.
+
+        When every model parameter is passed as a ready made instance only
+        the direct params are copied, the flat kwargs are not looked at.
+        """
+        if self.roots and all(
+            isinstance(kwargs.get(name, MISSING), accepts)
+            for name, accepts, _, _ in self.roots
+        ):
+            return {
+                name: kwargs[name]
+                for name in self.params
+                if kwargs.get(name, MISSING) is not MISSING
+            }
+        condensed, values, missing = self.collect(kwargs)
+        return self.assemble(condensed, values, missing, construct=construct)
+
+    def condense_many(
+        self,
+        records: Iterable[Dict[str, Any]],
+        *,
+        construct: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily condense each record, as condense does.
+
+        Records with the same keys in the same order, such as the rows of one
+        file, are condensed by one function compiled for those keys by
+        `compile_row`. It builds every model in a single expression, skipping
+        the sorting of kwargs into node dicts that condense does per call.
+        Records with MISSING values, or that pass a model instance, fall back
+        to condense.
+        """
+        rows = self.rows
+        condense = self.condense
+        last = None
+        row = None
+        for record in records:
+            keys = tuple(record)
+            if keys != last:
+                key = (keys, construct)
+                try:
+                    row = rows[key]
+                except KeyError:
+                    row = compile_row(self, keys, construct=construct)
+                    if len(rows) >= MAX_CACHED_ROWS:
+                        rows.clear()
+                    rows[key] = row
+                last = keys
+            condensed = None if row is None else row(*record.values())
+            if condensed is None:
+                condensed = condense(record, construct=construct)
+            yield condensed
+
+    def collect(
+        self,
+        kwargs: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[str]]:
+        """Sort kwargs into direct params, node values, and MISSING names."""
+        condensed = {}
+        values: List[Dict[str, Any]] = [{} for _ in self.nodes]
+        params = self.params
+        slots = self.slots
+        missing = []
+        for name, value in kwargs.items():
+            if value is MISSING:
+                if name not in params:
+                    missing.append(name)
+                continue
+            if name in params:
+                condensed[name] = value
+            targets = slots.get(name)
+            if targets is not None:
+                for index, field_name in targets:
+                    values[index][field_name] = value
+        return condensed, values, missing
+
+    def assemble(
+        self,
+        condensed: Dict[str, Any],
+        values: List[Dict[str, Any]],
+        missing: List[str],
+        *,
+        construct: bool = False,
+    ) -> Dict[str, Any]:
+        """Build each model parameter from what collect sorted out, into condensed."""
+        slots = self.slots
+        optional = self.optional
+        builders = self.builders["none" if construct else self.validate]
+        for name, accepts, start, stop in self.roots:
+            value = condensed.get(name, MISSING)
+            if isinstance(value, accepts):
+                # the caller passed a ready made instance
+                continue
+            if value is not MISSING and name not in slots:
+                msg = f"{name} must be a {accepts[0].__name__}, not {value!r}"
+                raise TypeError(msg)
+            if name in optional and not drop_none(values, start, stop):
+                condensed[name] = None
+                continue
+            if missing:
+                check_missing(missing, self.required, slots, start, stop)
+            condensed[name] = self.build(values, builders, start, stop)
+        return condensed
+
+    def build(
+        self,
+        values: List[Dict[str, Any]],
+        builders: Tuple[Optional[Callable], ...],
+        start: int,
+        stop: int,
+    ) -> Any:
+        """Build nodes start to stop from values, returning the last one."""
+        nodes = self.nodes
+        for index in range(start, stop - 1):
+            _, parent, field_name = nodes[index]
+            build = builders[index]
+            if build is None:
+                # validated once, along with the outer model
+                values[parent][field_name] = values[index]
+            else:
+                values[parent][field_name] = build(**values[index])
+        return builders[stop - 1](**values[stop - 1])
+
+
+def compile_row(
+    plan: CondensePlan,
+    keys: Tuple[str, ...],
+    *,
+    construct: bool = False,
+) -> Optional[Callable]:
+    """Compile a function that condenses the values of a record with keys.
+
+    The function takes the values positionally and returns the condensed
+    kwargs, or None when a value is MISSING. Returns None instead of a
+    function when the keys need the general path of `CondensePlan.condense`,
+    as do all keys of a plan with optional models.
+    """
+    if plan.optional:
+        return None
+    roots = {name for name, *_ in plan.roots}
+    names = [f"v{index}" for index in range(len(keys))]
+    fields: List[List[str]] = [[] for _ in plan.nodes]
+    condensed = []
+    for key, name in zip(keys, names):
+        if key in roots:
+            return None
+        if key in plan.params:
+            condensed.append(f"{key!r}: {name}")
+        for index, field_name in plan.slots.get(key, ()):
+            fields[index].append(f"{field_name}={name}")
+
+    builders = plan.builders["none" if construct else plan.validate]
+    namespace: Dict[str, Any] = {"MISSING": MISSING}
+    for index, (_, parent, field_name) in enumerate(plan.nodes):
+        if not field_name.isidentifier() or keyword.iskeyword(field_name):
+            return None
+        build = builders[index]
+        if build is None:
+            build = dict
+        namespace[f"b{index}"] = build
+        expression = f"b{index}({', '.join(fields[index])})"
+        if parent == -1:
+            condensed.append(f"{field_name!r}: {expression}")
+        else:
+            fields[parent].append(f"{field_name}={expression}")
+    if any(
+        not field_name.isidentifier() or keyword.iskeyword(field_name)
+        for targets in plan.slots.values()
+        for _, field_name in targets
+    ):
+        return None
+
+    lines = [f"def row({', '.join(names)}):"]
+    if names:
+        lines.append(f"    if {' or '.join(f'{name} is MISSING' for name in names)}:")
+        lines.append("        return None")
+    lines.append(f"    return {{{', '.join(condensed)}}}")
+    exec(compile("\n".join(lines), "<engorgio>", "exec"), namespace)  # noqa: S102
+    return namespace["row"]
+
+
+def drop_none(values: List[Dict[str, Any]], start: int, stop: int) -> bool:
+    """Drop None values of nodes start to stop, return if any value is left."""
+    found = False
+    for index in range(start, stop):
+        node = values[index]
+        for field_name in [name for name, value in node.items() if value is None]:
+            del node[field_name]
+        found = found or bool(node)
+    return found
+
+
+def check_missing(
+    missing: List[str],
+    required: FrozenSet[str],
+    slots: Dict[str, Tuple[Tuple[int, str], ...]],
+    start: int,
+    stop: int,
+) -> None:
+    """Raise a TypeError if a required flat name of nodes start to stop is missing."""
+    absent = [
+        name
+        for name in missing
+        if name in required and start <= slots[name][0][0] < stop
+    ]
+    if absent:
+        msg = f"missing required arguments: {', '.join(absent)}"
+        raise TypeError(msg)
+
+
+def make_condense_plan(
+    func: Callable,
+    model_separator: str = "__",
+    *,
+    include_parent_model: bool = True,
+    validate: str = "full",
+) -> CondensePlan:
+    """Compile the CondensePlan for func."""
+    if validate not in VALIDATE:
+        msg = f"unknown validate {validate!r}, expected one of {VALIDATE}"
+        raise ValueError(msg)
+
+    slots: Dict[str, List[Tuple[int, str]]] = {}
+    nodes: List[Tuple[Any, int, str]] = []
+    roots: List[Tuple[str, Tuple[type, ...], int, int]] = []
+    builders: Dict[str, List[Optional[Callable]]] = {mode: [] for mode in VALIDATE}
+    required = set()
+    optional = set()
+
+    sig = inspect.signature(func)
+    for name, param in sig.parameters.items():
+        model = model_type(param.annotation)
+        if model is None:
+            continue
+        schema = schema_cache.get(model, model_separator)
+        if is_optional_model(param):
+            optional.add(name)
+        start = len(nodes)
+        index = {path: start + i for i, (path, _) in enumerate(schema.models)}
+        for path, node_model in schema.models:
+            if path:
+                nodes.append((node_model, index[path[:-1]], path[-1]))
+            else:
+                nodes.append((node_model, -1, name))
+            adapter = get_adapter(node_model)
+            for mode, mode_builders in builders.items():
+                attr = adapter.constructor(mode, nested=bool(path))
+                if attr is None:
+                    mode_builders.append(None)
+                else:
+                    mode_builders.append(getattr(node_model, attr) if attr else node_model)
+        for field in schema.fields:
+            flat_name = (
+                f"{name}{model_separator}{field.name}"
+                if include_parent_model
+                else field.path[-1]
             )
-    if include_parent_model:
-        param_kwargs = get_kwargs_for_param(
-            param=param,
-            kwargs=kwargs,
-            model_separator=model_separator,
-        )
-    else:
-        param_kwargs = kwargs
-    return param.annotation(**param_kwargs, **models)
+            slots.setdefault(flat_name, []).append(
+                (index[field.path[:-1]], field.path[-1]),
+            )
+            if field.default is inspect.Parameter.empty and name not in optional:
+                required.add(flat_name)
+        accepts = (schema.adapter.instance_type(model),)
+        if model is not param.annotation:
+            accepts = (*accepts, type(None))
+        roots.append((name, accepts, start, len(nodes)))
+
+    return CondensePlan(
+        params=frozenset(sig.parameters),
+        slots={name: tuple(targets) for name, targets in slots.items()},
+        nodes=tuple(nodes),
+        roots=tuple(roots),
+        builders={mode: tuple(built) for mode, built in builders.items()},
+        required=frozenset(required),
+        optional=frozenset(optional),
+        rows={},
+        validate=validate,
+    )
 
 
 def condense_instances(
@@ -67,28 +445,10 @@ def condense_instances(
     """Condense expanded kwargs back to model instances.
 
     Inspects the arguments of the func and expands any of the kwargs with a
-    Pydantic annotation, to add its fields to the kwargs.
+    model annotation, to add its fields to the kwargs.
     """
-    sig = inspect.signature(func)
-    updated_kwargs = {}
-    for name, value in kwargs.items():
-        if name in sig.parameters:
-            updated_kwargs[name] = value
-
-    for name, param in sig.parameters.items():
-        # func wants this directly
-        # this should check isinstance, but it's not working
-        #
-        if name in kwargs and repr(param.annotation) == repr(kwargs[name]):
-            updated_kwargs[name] = kwargs[name]
-
-        # an instance was not passed in, create one with kwargs passed in
-        elif hasattr(param.annotation, "__fields__"):
-            updated_kwargs[name] = expand_param(
-                param=param,
-                kwargs=kwargs,
-                model_separator=model_separator,
-                include_parent_model=include_parent_model,
-            )
-        # its something else so pass it
-    return updated_kwargs
+    return make_condense_plan(
+        func=func,
+        model_separator=model_separator,
+        include_parent_model=include_parent_model,
+    ).condense(kwargs)
@@ -0,0 +1,208 @@
+"""Read the arguments of expanded functions from YAML, TOML, or JSON files.
+
+With `engorgio(config_option=True)` the expanded function accepts a
+`config_file`, a file shaped like the arguments of the decorated function,
+model arguments as nested mappings.
+
+```yaml
+person:
+  name: me
+  hair:
+    length: 1
+```
+
+Precedence is explicit arguments, then the file, then the defaults. Files are
+parsed with anyconfig and cached by path, mtime, and size.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from engorgio.adapters import MISSING
+from engorgio.condense import CondensePlan
+from engorgio.schema import model_type, schema_cache
+
+__all__ = [
+    "CONFIG_OPTION",
+    "ConfigCache",
+    "ConfigSource",
+    "config_cache",
+    "config_index",
+]
+
+CONFIG_OPTION = "config_file"
+
+
+class ConfigEntry(NamedTuple):
+
+    """A parsed config file.
+
+    * `stamp`: `(st_mtime_ns, st_size)` when the file was parsed.
+    * `data`: what anyconfig loaded.
+    * `derived`: per ConfigSource results, such as the flat kwargs, dropped
+      along with the entry when the file changes.
+    """
+
+    stamp: Tuple[int, int]
+    data: Dict[str, Any]
+    derived: Dict[Tuple[Any, str], Any]
+
+
+class ConfigCache:
+
+    """A bounded, least recently used cache of parsed config files.
+
+    Each lookup stats the file and parses it again only if its mtime or size
+    changed. Safe to share between threads, files are parsed outside the
+    lock.
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """Create an empty cache holding up to maxsize files."""
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, ConfigEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached files."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Drop every cached file."""
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, path: Any) -> ConfigEntry:
+        """Get the ConfigEntry for path, parsing it if needed."""
+        key = str(Path(path).absolute())
+        stat = Path(key).stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = ConfigEntry(stamp=stamp, data=self._load(key), derived={})
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _load(self, path: str) -> Dict[str, Any]:
+        import anyconfig
+
+        data = anyconfig.load(path)
+        if not isinstance(data, dict):
+            msg = f"{path} must hold a mapping of arguments, not {type(data).__name__}"
+            raise TypeError(msg)
+        return dict(data)
+
+
+config_cache = ConfigCache()
+
+
+def config_index(
+    func: Callable,
+    model_separator: str = "__",
+    *,
+    include_parent_model: bool = True,
+) -> Dict[Tuple[str, ...], str]:
+    """Map the path of each argument in a config file to its flat name.
+
+    Model arguments are nested under their name, or sit at the top of the
+    file without include_parent_model.
+    """
+    index = {}
+    for name, param in inspect.signature(func).parameters.items():
+        model = model_type(param.annotation)
+        if model is None:
+            index[(name,)] = name
+            continue
+        for field in schema_cache.get(model, model_separator).fields:
+            if include_parent_model:
+                index[(name, *field.path)] = f"{name}{model_separator}{field.name}"
+            else:
+                index[field.path] = field.path[-1]
+    return index
+
+
+def flatten_config(
+    data: Dict[str, Any],
+    index: Dict[Tuple[str, ...], str],
+) -> Dict[str, Any]:
+    """Flatten the nested mappings of data into flat kwargs with index."""
+    flat = {}
+    unknown = []
+    stack: List[Tuple[Tuple[str, ...], Any]] = [
+        ((key,), value) for key, value in data.items()
+    ]
+    while stack:
+        path, value = stack.pop()
+        name = index.get(path)
+        if name is not None:
+            flat[name] = value
+        elif isinstance(value, dict):
+            stack.extend(((*path, key), item) for key, item in value.items())
+        else:
+            unknown.append(".".join(path))
+    if unknown:
+        msg = f"unknown config keys: {', '.join(sorted(unknown))}"
+        raise ValueError(msg)
+    return flat
+
+
+class ConfigSource:
+
+    """Fills the arguments of one expanded function from config files.
+
+    Arguments left MISSING are taken from the file. Each file is parsed and
+    flattened once while it is unchanged, the models are built fresh on every
+    call.
+    """
+
+    def __init__(
+        self,
+        plan: CondensePlan,
+        index: Dict[Tuple[str, ...], str],
+        cache: Optional[ConfigCache] = None,
+    ) -> None:
+        """Create a ConfigSource for plan, see `config_index` for index."""
+        self.plan = plan
+        self.index = index
+        self.cache = config_cache if cache is None else cache
+
+    def flat(self, entry: ConfigEntry) -> Dict[str, Any]:
+        """Get the flat kwargs of entry, flattened once per file."""
+        key = (self, "flat")
+        flat = entry.derived.get(key)
+        if flat is None:
+            flat = entry.derived[key] = flatten_config(entry.data, self.index)
+        return flat
+
+    def merge(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Pop the config file out of kwargs and fill unset kwargs from it."""
+        path = kwargs.pop(CONFIG_OPTION, None)
+        if path is None or path is MISSING:
+            return kwargs
+        for name, value in self.flat(self.cache.get(path)).items():
+            if kwargs.get(name, MISSING) is MISSING:
+                kwargs[name] = value
+        return kwargs
+
+    def condense(
+        self,
+        kwargs: Dict[str, Any],
+        *,
+        construct: bool = False,
+    ) -> Dict[str, Any]:
+        """Merge the config file into kwargs, then condense them with the plan."""
+        return self.plan.condense(self.merge(kwargs), construct=construct)
@@ -4,48 +4,230 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 
 SPDX-License-Identifier: MIT
 """
-from functools import wraps
-from typing import Any, Callable
+import inspect
+from functools import partial, wraps
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 
-import typer
-
-from engorgio.condense import condense_instances
+from engorgio.adapters import MISSING
+from engorgio.batch import make_amap, make_batch, make_map, make_pmap
+from engorgio.condense import CondensePlan, make_condense_plan
+from engorgio.config import ConfigSource, config_index
+from engorgio.env import EnvSource, env_index
 from engorgio.expand import make_expanded_function
+from engorgio.hooks import HOOKS, acall_timed, call_timed, function_name, timed
+from engorgio.lazy import LazyFunction
+
+__all__ = ["Expansion", "engorgio"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import typer only when it is asked for."""
+    if name == "typer":
+        import typer
+
+        return typer
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def unset_none(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark the options typer left unset as MISSING, typer passes them as None."""
+    return {name: MISSING if value is None else value for name, value in kwargs.items()}
+
+
+def condense_unset(
+    condense: Callable[..., Dict[str, Any]],
+    kwargs: Dict[str, Any],
+    *,
+    construct: bool = False,
+) -> Dict[str, Any]:
+    """Mark the options typer left unset, then condense kwargs with condense."""
+    return condense(unset_none(kwargs), construct=construct)
 
-__all__ = ["typer"]
 
+class Expansion(NamedTuple):
 
-def engorgio(
+    """What engorgio knows about a decorated function.
+
+    Stored on every expanded function as `__engorgio__`. `condense` is what
+    each call runs, the plan's condense after any config file and
+    environment sources, and `merge` fills unset flat kwargs from those
+    sources, None when there are none.
+    """
+
+    func: Callable
+    plan: CondensePlan
+    model_separator: str
+    include_parent_model: bool
+    typer: bool
+    backend: str
+    validate: str
+    config_option: bool
+    env_prefix: Optional[str]
+    condense: Callable[..., Dict[str, Any]]
+    merge: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]
+
+
+def engorgio(  # noqa: PLR0913
     *,
     model_separator: str = "__",
     include_parent_model: bool = True,
     typer: bool = False,
+    backend: str = "signature",
+    lazy: bool = False,
+    disk_cache: bool = False,
+    validate: str = "full",
+    trusted: bool = False,
+    config_option: bool = False,
+    env_prefix: Optional[str] = None,
 ) -> Callable:
     """Expand Pydantic keyword arguments.
 
     Decorator function to expand arguments of pydantic models to accept the
     individual fields of Models.
+
+    `backend="exec"` restores the original source rendering path for
+    compatibility.
+
+    `lazy=True` returns a LazyFunction that waits to expand func until it is
+    first called or introspected.
+
+    `disk_cache=True` stores the code `backend="exec"` generates under
+    `$XDG_CACHE_HOME/engorgio` so later processes skip black and pyflyby.
+    The signature backend generates no source, and raises a ValueError.
+
+    The returned function also has `.map(records)` and `.batch(records)` to
+    call it over many flat records with one compiled plan, and
+    `.pmap(records, workers=N)` to spread them over a process pool. Records
+    are filled from the config file and environment just as calls are.
+
+    `async def` functions stay coroutine functions once expanded, and get
+    `.amap(records, concurrency=N)` to await many records at once.
+
+    Register a hook with `engorgio.hooks.add_hook` to time each stage of
+    decorating and calling.
+
+    `validate` picks how the models are rebuilt on each call, `"full"`
+    validates every nested model, `"outer"` passes nested fields as dicts and
+    validates once at the outer model, and `"none"` uses `Model.construct`
+    with no validation. `trusted=True` is shorthand for `validate="none"`.
+
+    `config_option=True` adds a `config_file` argument, a YAML, TOML, or JSON
+    file shaped like the arguments of func, see `engorgio.config`. Arguments
+    that are set override the file.
+
+    `env_prefix` reads unset model fields from environment variables named
+    `{env_prefix}{flat name}` upper cased, such as `APP_PERSON__HAIR__LENGTH`
+    for `env_prefix="APP_"`, see `engorgio.env`. Explicit arguments override
+    the environment, which overrides the config file, then the defaults.
+    Only arguments left out are filled in. typer passes every option left
+    out as None, so with `typer=True` None arguments count as left out.
     """
+    if trusted:
+        validate = "none"
 
     def decorator(func: Callable) -> Callable[..., Any]:
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(
-                *args,
-                **condense_instances(
-                    func=func,
-                    kwargs=kwargs,
-                    model_separator=model_separator,
+        if lazy:
+            return LazyFunction(func, partial(expand, func))
+        return expand(func)
+
+    def expand(func: Callable) -> Callable[..., Any]:
+        name = function_name(func)
+        with timed(name, "flatten"):
+            plan = make_condense_plan(
+                func=func,
+                model_separator=model_separator,
+                include_parent_model=include_parent_model,
+                validate=validate,
+            )
+        condense = plan.condense
+        # each source fills the arguments left unset, in order of precedence
+        merges: List[Callable[[Dict[str, Any]], Dict[str, Any]]] = []
+        if config_option:
+            config = ConfigSource(
+                plan,
+                config_index(
+                    func,
+                    model_separator,
                     include_parent_model=include_parent_model,
                 ),
             )
+            condense = config.condense
+            merges.append(config.merge)
+        if env_prefix is not None:
+            env = EnvSource(
+                env_index(
+                    func,
+                    env_prefix,
+                    model_separator,
+                    include_parent_model=include_parent_model,
+                ),
+                condense,
+            )
+            condense = env.condense
+            merges.insert(0, env.merge)
+        if typer:
+            # the model and the sources only fill MISSING arguments
+            merges.insert(0, unset_none)
+            condense = partial(condense_unset, condense)
+        merge = None
+        if merges:
+
+            def merge(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+                for source in merges:
+                    kwargs = source(kwargs)
+                return kwargs
 
-        return make_expanded_function(
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if HOOKS:
+                    if merge is not None:
+                        kwargs = merge(kwargs)
+                    return await acall_timed(name, func, plan, args, kwargs)
+                return await func(*args, **condense(kwargs))
+
+        else:
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if HOOKS:
+                    if merge is not None:
+                        kwargs = merge(kwargs)
+                    return call_timed(name, func, plan, args, kwargs)
+                return func(*args, **condense(kwargs))
+
+        expanded = make_expanded_function(
             func=func,
             wrapper=wrapper,
             include_parent_model=include_parent_model,
             model_separator=model_separator,
             typer=typer,
+            backend=backend,
+            disk_cache=disk_cache,
+            config_option=config_option,
+            env_prefix=env_prefix,
+            validate=validate,
+        )
+        expanded.__engorgio__ = Expansion(
+            func=func,
+            plan=plan,
+            model_separator=model_separator,
+            include_parent_model=include_parent_model,
+            typer=typer,
+            backend=backend,
+            validate=validate,
+            config_option=config_option,
+            env_prefix=env_prefix,
+            condense=condense,
+            merge=merge,
         )
+        expanded.map = make_map(expanded.__engorgio__)
+        expanded.batch = make_batch(expanded.__engorgio__)
+        expanded.pmap = make_pmap(func)
+        if inspect.iscoroutinefunction(func):
+            expanded.amap = make_amap(expanded.__engorgio__)
+        return expanded
 
     return decorator
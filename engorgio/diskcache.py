@@ -0,0 +1,128 @@
+"""Persist generated expansions on disk across process restarts.
+
+Opt in with `engorgio(backend="exec", disk_cache=True)`. The signature
+backend builds functions without generating source, so it has nothing to
+cache and refuses `disk_cache=True`. Entries live in `$ENGORGIO_CACHE_DIR`,
+or `$XDG_CACHE_HOME/engorgio`, or `~/.cache/engorgio`.
+
+Keys hash everything the generated code depends on, the rendered
+signature includes every flat name, annotation, default, and description,
+so a changed model is simply a new key and stale entries age out of the
+least recently used size cap.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+from engorgio.__about__ import __version__
+
+SUFFIX = ".marshal"
+
+
+def default_cache_dir() -> Path:
+    """Get the directory engorgio caches expansions in."""
+    if os.getenv("ENGORGIO_CACHE_DIR"):
+        return Path(os.environ["ENGORGIO_CACHE_DIR"])
+    xdg_cache_home = os.getenv("XDG_CACHE_HOME")
+    root = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return root / "engorgio"
+
+
+def cache_key(*parts: Any) -> str:
+    """Hash parts along with the engorgio and python versions."""
+    digest = hashlib.sha256()
+    for part in (__version__, sys.implementation.cache_tag, *parts):
+        digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskCache:
+
+    """A directory of marshalled values with a least recently used size cap.
+
+    Writes go to a temporary file that is renamed into place, so concurrent
+    processes only ever see whole entries. Reads refresh an entry's mtime,
+    and writes evict the oldest entries once the directory passes
+    max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        """Use the cache directory at path, created on first write."""
+        self.path = Path(path) if path is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry(self, key: str) -> Path:
+        return self.path / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Any:
+        """Get the value stored under key, or None."""
+        entry = self._entry(key)
+        try:
+            value = marshal.loads(entry.read_bytes())  # noqa: S302
+            os.utime(entry)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, a failed write only means a cache miss."""
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.path,
+                prefix=".",
+                suffix=".tmp",
+                delete=False,
+            ) as handle:
+                handle.write(marshal.dumps(value))
+            Path(handle.name).replace(self._entry(key))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until under max_bytes."""
+        entries = []
+        for entry in self.path.glob(f"*{SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for entry in self.path.glob(f"*{SUFFIX}"):
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+
+
+@lru_cache(maxsize=None)
+def get_disk_cache() -> DiskCache:
+    """Get the DiskCache shared by this process."""
+    return DiskCache()
@@ -0,0 +1,97 @@
+"""Read the model fields of expanded functions from environment variables.
+
+With `engorgio(env_prefix="APP_")` each model field can be set with an
+environment variable named after its flat argument, upper cased, so
+`person__hair__length` is read from `APP_PERSON__HAIR__LENGTH`.
+
+Precedence is explicit arguments, then the environment, then the config file
+of `config_option`, then the defaults. Values are the raw strings, so the
+model is left to parse them.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+import os
+from typing import Any, Callable, Dict
+
+from engorgio.adapters import MISSING
+from engorgio.schema import model_type, schema_cache
+
+__all__ = [
+    "EnvSource",
+    "env_index",
+    "env_name",
+]
+
+
+def env_name(env_prefix: str, name: str) -> str:
+    """Name the environment variable of the flat argument name."""
+    return f"{env_prefix}{name}".upper()
+
+
+def env_index(
+    func: Callable,
+    env_prefix: str = "",
+    model_separator: str = "__",
+    *,
+    include_parent_model: bool = True,
+) -> Dict[str, str]:
+    """Map the environment variable of each model field of func to its flat name."""
+    index = {}
+    for name, param in inspect.signature(func).parameters.items():
+        model = model_type(param.annotation)
+        if model is None:
+            continue
+        for field in schema_cache.get(model, model_separator).fields:
+            flat_name = (
+                f"{name}{model_separator}{field.name}"
+                if include_parent_model
+                else field.path[-1]
+            )
+            index[env_name(env_prefix, flat_name)] = flat_name
+    return index
+
+
+class EnvSource:
+
+    """Fills the arguments of one expanded function from the environment.
+
+    Arguments left MISSING are taken from the environment, with the
+    index built by `env_index`. Each call is one pass over whichever is
+    smaller, the index or `os.environ`, whose items are decoded on each read.
+    """
+
+    def __init__(
+        self,
+        index: Dict[str, str],
+        condense: Callable[..., Dict[str, Any]],
+    ) -> None:
+        """Create an EnvSource that hands merged kwargs on to condense."""
+        self.index = index
+        self._condense = condense
+
+    def merge(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill unset kwargs from the environment."""
+        index = self.index
+        environ = os.environ
+        if len(index) < len(environ):
+            found = (
+                (name, environ[key]) for key, name in index.items() if key in environ
+            )
+        else:
+            found = ((index[key], environ[key]) for key in environ if key in index)
+        for name, value in found:
+            if kwargs.get(name, MISSING) is MISSING:
+                kwargs[name] = value
+        return kwargs
+
+    def condense(
+        self,
+        kwargs: Dict[str, Any],
+        *,
+        construct: bool = False,
+    ) -> Dict[str, Any]:
+        """Merge the environment into kwargs, then condense them."""
+        return self._condense(self.merge(kwargs), construct=construct)
@@ -8,15 +8,36 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 SPDX-License-Identifier: MIT
 """
 
+import importlib
 import inspect
 import os
-from typing import Callable, Dict, Optional
-
-import black
-from pydantic.fields import ModelField
-
-
-def create_default(field: ModelField) -> str:
+import threading
+from functools import lru_cache, partial
+from types import CodeType, FunctionType, ModuleType
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from engorgio.adapters import MISSING, PydanticAdapter, get_adapter
+from engorgio.config import CONFIG_OPTION
+from engorgio.diskcache import cache_key, get_disk_cache
+from engorgio.env import env_name
+from engorgio.hooks import function_name, timed
+from engorgio.schema import (
+    FieldSchema,
+    is_model,
+    is_optional_model,
+    model_type,
+    parameter_schema,
+    schema_cache,
+)
+
+if TYPE_CHECKING:
+    from pydantic.fields import ModelField
+
+MAX_INLINE_ARGS = 256
+CODEGEN_LOCK = threading.Lock()
+
+
+def create_default(field: "ModelField") -> str:
     """Create the default value for pydantic ModelFields."""
     if "=" not in repr(field) and not hasattr(field, "required"):
         default = ""
@@ -36,7 +57,7 @@ def create_default(field: ModelField) -> str:
 
 def create_default_typer(
     panel_name: str,
-    field: ModelField,
+    field: "ModelField",
     *,
     prompt_always: bool = False,
 ) -> str:
@@ -61,7 +82,7 @@ def create_default_typer(
 
 def make_annotation(
     name: str,
-    field: ModelField,
+    field: "ModelField",
     # parents: Dict[str, str],
     model_separator: str = "__",
     *,
@@ -93,32 +114,128 @@ def make_annotation(
     return f"{name}{annotation}{default}"
 
 
-def init_more_args(
+def create_default_typer_value(
+    panel_name: str,
+    field: FieldSchema,
+    *,
+    prompt_always: bool = False,
+    config_option: bool = False,
+    envvar: Optional[str] = None,
+) -> Any:
+    """Create the typer.Option for a FieldSchema as an object.
+
+    Mirrors `create_default_typer` without rendering source. With
+    config_option every field may come from the config file, so none are
+    required or prompted for and unset fields are None, as are fields the
+    model fills in. envvar lets typer read the field from the environment.
+    """
+    import typer
+
+    if field.description is None:
+        return field.default
+    if config_option or field.default is MISSING:
+        return typer.Option(
+            None,
+            help=field.description,
+            rich_help_panel=panel_name,
+            envvar=envvar,
+        )
+    prompt = {"prompt": True} if prompt_always else {}
+    if field.default is inspect.Parameter.empty:
+        return typer.Option(
+            ...,
+            help=field.description,
+            rich_help_panel=panel_name,
+            prompt=True,
+            envvar=envvar,
+        )
+    return typer.Option(
+        field.default,
+        help=field.description,
+        rich_help_panel=panel_name,
+        envvar=envvar,
+        **prompt,
+    )
+
+
+def make_parameter(  # noqa: PLR0913
+    name: str,
+    field: FieldSchema,
+    model_separator: str = "__",
+    *,
+    typer: bool = False,
+    prompt_always: bool = False,
+    config_option: bool = False,
+    env_prefix: Optional[str] = None,
+) -> inspect.Parameter:
+    """Create an inspect.Parameter for a FieldSchema.
+
+    The object equivalent of `make_annotation`.
+    """
+    if typer:
+        default = create_default_typer_value(
+            panel_name="--".join(name.split(model_separator)[:-1]),
+            field=field,
+            prompt_always=prompt_always,
+            config_option=config_option,
+            envvar=None if env_prefix is None else env_name(env_prefix, name),
+        )
+    else:
+        default = field.default
+
+    return inspect.Parameter(
+        name,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        default=default,
+        annotation=field.annotation,
+    )
+
+
+def make_config_parameter(*, typer: bool = False) -> inspect.Parameter:
+    """Create the `config_file` parameter added by `config_option`."""
+    default: Any = None
+    if typer:
+        import typer as typer_module
+
+        default = typer_module.Option(
+            None,
+            help="YAML, TOML, or JSON file to read arguments from.",
+        )
+    return inspect.Parameter(
+        CONFIG_OPTION,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        default=default,
+        annotation=Optional[str],
+    )
+
+
+def get_flat_fields(
     func: Callable,
-    more_args: Dict,
     model_separator: str = "__",
     *,
-    include_parent_model: bool = False,
-) -> Dict:
-    """Initialize the more_args dict."""
-    parents = {}
-    sig = inspect.signature(func)
-    for name, param in sig.parameters.items():
-        if hasattr(param.annotation, "__fields__"):
-            if include_parent_model:
-                new_param = {
-                    f"{name}{model_separator}{k}": v
-                    for k, v in param.annotation.__fields__.items()
-                }
-            else:
-                new_param = param.annotation.__fields__
-            more_args = {**more_args, **new_param}
-            for field in param.annotation.__fields__:
-                parents[field] = param.annotation.__name__
+    include_parent_model: bool = True,
+) -> Dict[str, FieldSchema]:
+    """Get every argument of func flattened to its leaf fields.
+
+    Models are looked up in the schema cache, anything else is kept as is.
+    The fields of an `Optional[Model] = None` argument all default to None,
+    none of them are needed to leave the model out.
+    """
+    flat_fields = {}
+    for name, param in inspect.signature(func).parameters.items():
+        model = model_type(param.annotation)
+        if model is not None:
+            optional = is_optional_model(param)
+            for field in schema_cache.get(model, model_separator).fields:
+                if optional:
+                    field = field._replace(default=None)  # noqa: PLW2901
+                if include_parent_model:
+                    flat_fields[f"{name}{model_separator}{field.name}"] = field
+                else:
+                    flat_fields[field.path[-1]] = field
         else:
-            more_args[name] = param
-        return more_args, parents
-    return None
+            flat_fields[name] = parameter_schema(param)
+    return flat_fields
 
 
 def get_more_args(
@@ -131,66 +248,300 @@ def get_more_args(
     """Get the more_args dict."""
     if more_args is None:
         more_args = {}
-    more_args, parents = init_more_args(
+    for name, field in get_flat_fields(
         func=func,
         model_separator=model_separator,
-        include_parent_model=include_parent_model,
-        more_args=more_args,
-    )
+        include_parent_model=bool(include_parent_model),
+    ).items():
+        more_args[name] = field.field
+    return more_args
 
-    while any(
-        hasattr(param.annotation, "__fields__") for name, param in more_args.items()
-    ):
-        keys_to_remove = []
-        for name, param in more_args.items():
-            if hasattr(param.annotation, "__fields__"):
-                # model parent lookup
 
-                if name not in param.annotation.__fields__:
-                    keys_to_remove.append(name)
+@lru_cache(maxsize=1024)
+def compile_source(source: str) -> CodeType:
+    """Compile the source of an exec backend function, once per source."""
+    return compile(source, "<engorgio>", "exec")
 
-                if include_parent_model:
-                    new_param = {
-                        f"{name}{model_separator}{k}": v
-                        for k, v in param.annotation.__fields__.items()
-                    }
-                else:
-                    new_param = param.annotation.__fields__
 
-                more_args = {**more_args, **new_param}
+@lru_cache(maxsize=1024)
+def compile_expanded(
+    names: Tuple[str, ...],
+    *,
+    is_async: bool = False,
+    keyword_only: Tuple[str, ...] = (),
+    direct: Optional[Tuple[str, ...]] = None,
+) -> CodeType:
+    """Compile the code object that forwards names to the wrapper.
 
-                for field in param.annotation.__fields__:
-                    parents[field] = param.annotation.__name__
+    With is_async it is an `async def` that awaits the wrapper.
+    keyword_only names are added after `*` and forwarded as well.
 
-        for key in keys_to_remove:
-            del more_args[key]
-    return more_args
+    With direct, the names of func's own arguments, a call that passes every
+    keyword_only model forwards only those and direct, skipping the flat
+    fields the models already hold.
+
+    Cached, functions with the same arguments share one code object.
+
+    Past MAX_INLINE_ARGS the call forwards `**locals()` instead of spelling
+    out each keyword, compiling a call with thousands of keywords is
+    quadratic.
+    """
+    args = ", ".join(names)
+    if keyword_only:
+        args = ", ".join([*names, "*", *keyword_only])
+    if len(names) + len(keyword_only) > MAX_INLINE_ARGS:
+        call_args = "**locals()"
+    else:
+        call_args = ", ".join(f"{name}={name}" for name in (*names, *keyword_only))
+    prefix, call = ("async ", "await ") if is_async else ("", "")
+    lines = [f"{prefix}def expanded({args}):"]
+    if direct is not None and keyword_only:
+        passed = " and ".join(
+            f"{name} is not __engorgio_missing__" for name in keyword_only
+        )
+        forwarded = ", ".join(f"{name}={name}" for name in (*direct, *keyword_only))
+        lines.append(f"    if {passed}:")
+        lines.append(f"        return {call}__engorgio_wrapper__({forwarded})")
+    lines.append(f"    return {call}__engorgio_wrapper__({call_args})")
+    module = compile("\n".join(lines) + "\n", "<engorgio>", "exec")
+    return next(const for const in module.co_consts if isinstance(const, CodeType))
 
 
-def make_expanded_function(
+def make_signature_function(  # noqa: PLR0913
     func: Callable,
     wrapper: Callable,
     model_separator: str = "__",
     *,
     include_parent_model: bool = True,
     typer: bool = False,
+    config_option: bool = False,
+    env_prefix: Optional[str] = None,
+    validate: str = "full",
 ):
-    """Return a new function with that accepts model fields."""
-    more_args = get_more_args(
+    """Return a new function with that accepts model fields.
+
+    Builds the function directly from inspect.Parameter objects and a minimal
+    code object template, no source formatting or auto importing, so there
+    is no generated code worth keeping in the disk cache.
+
+    Each model argument of func is also accepted as a keyword only argument,
+    left out of `__signature__`, so a caller holding a model instance can
+    pass it as is. Required fields default to MISSING in the code object so
+    they can be left out when it is.
+
+    With config_option a `config_file` argument is added. With config_option
+    or env_prefix every field defaults to MISSING in the code object, so the
+    wrapper can tell the arguments the caller set from the ones to read from
+    the file or the environment. With `validate="none"` they do too, as
+    `Model.construct` fills in the model's own defaults and would take the
+    signature's as they are.
+    """
+    function = function_name(func)
+    with timed(function, "annotate"):
+        more_args = get_flat_fields(
+            func=func,
+            model_separator=model_separator,
+            include_parent_model=include_parent_model,
+        )
+
+        parameters = [
+            make_parameter(
+                name=name,
+                field=field,
+                model_separator=model_separator,
+                typer=typer,
+                config_option=config_option,
+                env_prefix=env_prefix,
+            )
+            for name, field in more_args.items()
+        ]
+        if config_option:
+            if CONFIG_OPTION in more_args:
+                msg = f"{function} already has a {CONFIG_OPTION!r} argument"
+                raise ValueError(msg)
+            parameters.append(make_config_parameter(typer=typer))
+
+        # split parameters into args and kwargs
+        args: List[inspect.Parameter] = [
+            param for param in parameters if param.default is inspect.Parameter.empty
+        ]
+        kwargs: List[inspect.Parameter] = [
+            param for param in parameters if param.default is not inspect.Parameter.empty
+        ]
+
+    # update the docscring
+    wrapper.__doc__ = (
+        func.__doc__ or ""
+    ) + f"\nalso accepts {more_args.keys()} in place of person model"
+
+    names = tuple(param.name for param in [*args, *kwargs])
+    keyword_only = tuple(
+        name
+        for name, param in inspect.signature(func).parameters.items()
+        if model_type(param.annotation) is not None and name not in more_args
+    )
+    with timed(function, "compile"):
+        is_async = inspect.iscoroutinefunction(func)
+        # only when a caller can pass every model as an instance
+        direct = None
+        if len(keyword_only) == sum(
+            model_type(param.annotation) is not None
+            for param in inspect.signature(func).parameters.values()
+        ):
+            direct = tuple(
+                name
+                for name in names
+                if name not in more_args or more_args[name].description is None
+            )
+        code = compile_expanded(
+            names,
+            is_async=is_async,
+            keyword_only=keyword_only,
+            direct=direct,
+        )
+
+        defaults = [param.default for param in kwargs]
+        if config_option:
+            # config_file is the last parameter
+            defaults = [*(MISSING for _ in kwargs[:-1]), None]
+        elif env_prefix is not None or validate == "none":
+            defaults = [MISSING for _ in kwargs]
+        new_func = FunctionType(
+            code,
+            {"__engorgio_wrapper__": wrapper, "__engorgio_missing__": MISSING},
+            func.__name__,
+            (*(MISSING for _ in args), *defaults) or None,
+        )
+        new_func.__kwdefaults__ = dict.fromkeys(keyword_only, MISSING) or None
+        new_func.__signature__ = inspect.Signature([*args, *kwargs])
+        new_func.__qualname__ = func.__qualname__
+        new_func.__module__ = func.__module__
+        new_func.__doc__ = func.__doc__
+        new_func.__annotations__ = {
+            param.name: param.annotation
+            for param in parameters
+            if param.annotation is not inspect.Parameter.empty
+        }
+    return new_func
+
+
+def object_path(value: Any) -> Tuple[str, Optional[str]]:
+    """Get the module and qualname to import value again, None for modules."""
+    if isinstance(value, ModuleType):
+        return value.__name__, None
+    return value.__module__, value.__qualname__
+
+
+def import_object(module: str, qualname: Optional[str]) -> Any:
+    """Import the object found by `object_path`."""
+    value = importlib.import_module(module)
+    for attr in qualname.split(".") if qualname else ():
+        value = getattr(value, attr)
+    return value
+
+
+def make_expanded_function(  # noqa: PLR0913
+    func: Callable,
+    wrapper: Callable,
+    model_separator: str = "__",
+    *,
+    include_parent_model: bool = True,
+    typer: bool = False,
+    backend: str = "signature",
+    disk_cache: bool = False,
+    config_option: bool = False,
+    env_prefix: Optional[str] = None,
+    validate: str = "full",
+):
+    """Return a new function with that accepts model fields.
+
+    `backend` selects how the function is built, "signature" builds it
+    directly, "exec" uses the original black, pyflyby, and exec path.
+    `disk_cache` reuses the code the exec backend generated in earlier
+    processes, exec backend only. `config_option` adds a `config_file`
+    argument, and `env_prefix` reads fields from the environment, signature
+    backend only. `validate` is the
+    condense plan's, see `engorgio`.
+    """
+    if backend == "signature":
+        if disk_cache:
+            msg = (
+                "disk_cache needs the exec backend, the signature backend "
+                "generates no code to cache"
+            )
+            raise ValueError(msg)
+        make_function = partial(
+            make_signature_function,
+            config_option=config_option,
+            env_prefix=env_prefix,
+            validate=validate,
+        )
+    elif backend == "exec":
+        if config_option or env_prefix is not None:
+            msg = "config_option and env_prefix need the signature backend"
+            raise ValueError(msg)
+        make_function = partial(
+            make_exec_function,
+            disk_cache=disk_cache,
+            validate=validate,
+        )
+    else:
+        msg = f"unknown backend {backend!r}, expected 'signature' or 'exec'"
+        raise ValueError(msg)
+    return make_function(
         func=func,
+        wrapper=wrapper,
         model_separator=model_separator,
         include_parent_model=include_parent_model,
+        typer=typer,
     )
 
-    annotations = [
-        make_annotation(
-            name=name,
-            field=field,
+
+def make_exec_function(  # noqa: PLR0913
+    func: Callable,
+    wrapper: Callable,
+    model_separator: str = "__",
+    *,
+    include_parent_model: bool = True,
+    typer: bool = False,
+    disk_cache: bool = False,
+    validate: str = "full",
+):
+    """Return a new function with that accepts model fields.
+
+    The original backend, renders the new function as source, formats it with
+    black, resolves imports with pyflyby, then execs it. With disk_cache
+    the compiled code and the imports pyflyby found are stored, so a warm
+    start skips black and pyflyby. With `validate="none"` the defaults of
+    the code object are MISSING, as in `make_signature_function`, and the
+    rendered ones are only kept in `__signature__`.
+    """
+    for param in inspect.signature(func).parameters.values():
+        model = model_type(param.annotation)
+        if model is not None and not isinstance(get_adapter(model), PydanticAdapter):
+            msg = (
+                f"the exec backend only expands pydantic v1 models, use the "
+                f"signature backend for {model.__name__}"
+            )
+            raise TypeError(msg)
+
+    function = function_name(func)
+    with timed(function, "annotate"):
+        more_args = get_more_args(
+            func=func,
             model_separator=model_separator,
-            typer=typer,
+            include_parent_model=include_parent_model,
         )
-        for name, field in more_args.items()
-    ]
+
+        annotations = [
+            make_annotation(
+                name=name,
+                field=field,
+                model_separator=model_separator,
+                typer=typer,
+            )
+            for name, field in more_args.items()
+        ]
 
     # split raw_args into args and kwargs
     aargs = ", ".join([arg for arg in annotations if "=" not in arg])
@@ -204,32 +555,68 @@ def make_expanded_function(
         func.__doc__ or ""
     ) + f"\nalso accepts {more_args.keys()} in place of person model"
 
-    new_func_str = f"""
+    with timed(function, "codegen"):
+        is_async = inspect.iscoroutinefunction(func)
+        prefix, call = ("async ", "await ") if is_async else ("", "")
+        new_func_str = f"""
 import typer
-def {func.__name__}({aargs}{', ' if aargs else ''}{kwargs}):
+{prefix}def {func.__name__}({aargs}{', ' if aargs else ''}{kwargs}):
     '''{func.__doc__}'''
-    return wrapper({call_args})
+    return {call}wrapper({call_args})
     """
-    new_func_str = black.format_str(src_contents=new_func_str, mode=black.FileMode())
-
-    pyflyby_log_level = os.getenv("PYFLYBY_LOG_LEVEL")
-    if pyflyby_log_level is None:
-        os.environ["PYFLYBY_LOG_LEVEL"] = "WARNING"
-
-    import pyflyby
-
-    pyflyby.auto_import(new_func_str, locals())
-
-    exec(new_func_str, locals(), globals())  # noqa: S102
-    new_func = globals()[func.__name__]
+        namespace: Dict[str, Any] = {"wrapper": wrapper}
+        cache = get_disk_cache() if disk_cache else None
+        key = cache_key("exec", func.__module__, func.__qualname__, new_func_str)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            imports, code = cached
+            for name, module, attr in imports:
+                namespace[name] = import_object(module, attr)
+        else:
+            # black and pyflyby are imported on first use and pyflyby keeps
+            # process wide state, so one thread at a time
+            with CODEGEN_LOCK:
+                import black
+
+                new_func_str = black.format_str(
+                    src_contents=new_func_str,
+                    mode=black.FileMode(),
+                )
+
+                os.environ.setdefault("PYFLYBY_LOG_LEVEL", "WARNING")
+
+                import pyflyby
+
+                pyflyby.auto_import(new_func_str, namespace)
+
+    with timed(function, "compile"):
+        if cached is None:
+            code = compile_source(new_func_str)
+            if cache is not None:
+                imports = tuple(
+                    (name, *object_path(value))
+                    for name, value in namespace.items()
+                    if name != "wrapper"
+                )
+                cache.set(key, (imports, code))
+
+        # a private namespace per function, nothing is left in this module and
+        # the function is collected along with it
+        exec(code, namespace)  # noqa: S102
+        new_func = namespace[func.__name__]
 
     sig = inspect.signature(new_func)
     for param in sig.parameters.values():
-        if hasattr(param.annotation, "__fields__"):
-            return make_expanded_function(
+        if is_model(param.annotation):
+            return make_exec_function(
                 new_func,
                 wrapper,
                 typer=typer,
                 model_separator=model_separator,
+                disk_cache=disk_cache,
+                validate=validate,
             )
+    if validate == "none" and new_func.__defaults__:
+        new_func.__signature__ = sig
+        new_func.__defaults__ = tuple(MISSING for _ in new_func.__defaults__)
     return new_func
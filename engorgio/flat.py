@@ -0,0 +1,155 @@
+"""Flatten model instances back into the flat kwargs of expanded functions.
+
+The inverse of condensing, `flatten(person, prefix="person")` gives
+`{"person__name": ..., "person__hair__color__r": ...}`, ready to call the
+expanded function again, log, or write out with
+`engorgio.stream.write_records`.
+
+Each model is flattened by one `operator.attrgetter` over the dotted paths of
+its leaf fields, built once from the cached schema.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from engorgio.adapters import AttrsAdapter, TypedDictAdapter, get_adapter
+from engorgio.schema import ModelSchema, schema_cache
+
+__all__ = ["flatten", "flattener"]
+
+MAX_CACHED_MODELS = 512
+
+_flatteners: Dict[
+    Tuple[Any, str, Optional[str]],
+    Tuple[ModelSchema, Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]],
+] = {}
+
+
+def path_getter(paths: Tuple[Tuple[str, ...], ...]) -> Callable[[Any], Tuple[Any, ...]]:
+    """Get the value at each path, by key for dicts and by attribute otherwise."""
+
+    def get(instance: Any) -> Tuple[Any, ...]:
+        values = []
+        for path in paths:
+            value = instance
+            for name in path:
+                value = value[name] if isinstance(value, dict) else getattr(value, name)
+            values.append(value)
+        return tuple(values)
+
+    return get
+
+
+def attribute_paths(schema: ModelSchema) -> Tuple[Tuple[str, ...], ...]:
+    """Get the attribute names down to each leaf field of schema's model.
+
+    Field paths use `__init__` argument names, attrs strips leading
+    underscores from those, so they are mapped back to each attribute's own
+    name.
+    """
+    renames = {}
+    for path, model in schema.models:
+        adapter = get_adapter(model)
+        if isinstance(adapter, AttrsAdapter):
+            renames[path] = {
+                field.name: field.field.name for field in adapter.fields(model)
+            }
+    return tuple(
+        tuple(
+            renames.get(field.path[:depth], {}).get(name, name)
+            for depth, name in enumerate(field.path)
+        )
+        for field in schema.fields
+    )
+
+
+def make_getter(schema: ModelSchema) -> Callable[[Any], Tuple[Any, ...]]:
+    """Create the function that reads every leaf of an instance of schema's model."""
+    paths = attribute_paths(schema)
+    if any(
+        isinstance(get_adapter(model), TypedDictAdapter) for _, model in schema.models
+    ):
+        return path_getter(paths)
+    if len(paths) == 1:
+        single = attrgetter(".".join(paths[0]))
+        return lambda instance: (single(instance),)
+    if not paths:
+        return lambda _: ()
+    return attrgetter(*(".".join(path) for path in paths))
+
+
+def flattener(
+    model: Any,
+    separator: str = "__",
+    prefix: Optional[str] = None,
+) -> Tuple[Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]:
+    """Get the flat names of model and the function that reads their values.
+
+    Cached until the model's schema is rebuilt.
+    """
+    if get_adapter(model) is None:
+        msg = f"cannot flatten {model!r}, it is not a model"
+        raise TypeError(msg)
+    key = (model, separator, prefix)
+    schema = schema_cache.get(model, separator)
+    cached = _flatteners.get(key)
+    if cached is not None and cached[0] is schema:
+        return cached[1], cached[2]
+
+    names = tuple(
+        field.name if prefix is None else f"{prefix}{separator}{field.name}"
+        for field in schema.fields
+    )
+    getter = make_getter(schema)
+    if len(_flatteners) >= MAX_CACHED_MODELS:
+        _flatteners.clear()
+    _flatteners[key] = (schema, names, getter)
+    return names, getter
+
+
+def flatten_batch(
+    batch: Iterable[Any],
+    separator: str = "__",
+    prefix: Optional[str] = None,
+    model: Optional[Any] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily flatten each instance of batch, see `flatten`."""
+    last = None
+    names: Tuple[str, ...] = ()
+    getter: Callable[[Any], Tuple[Any, ...]] = tuple
+    for instance in batch:
+        current = type(instance) if model is None else model
+        if current is not last:
+            names, getter = flattener(current, separator, prefix)
+            last = current
+        yield dict(zip(names, getter(instance)))
+
+
+def flatten(
+    instance_or_batch: Any,
+    separator: str = "__",
+    *,
+    prefix: Optional[str] = None,
+    model: Optional[Any] = None,
+) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Flatten a model instance into flat kwargs, or lazily flatten a batch.
+
+    Names are the leaf field paths joined with separator, prefixed with
+    `{prefix}{separator}` when prefix is given, as the argument name of an
+    expanded function would be. Any iterable that is not an instance is a
+    batch, flattened one instance at a time into an iterator of dicts.
+
+    TypedDicts are plain dicts once built, pass their class as model.
+    """
+    current = type(instance_or_batch) if model is None else model
+    adapter = get_adapter(current)
+    if adapter is not None and isinstance(
+        instance_or_batch,
+        adapter.instance_type(current),
+    ):
+        names, getter = flattener(current, separator, prefix)
+        return dict(zip(names, getter(instance_or_batch)))
+    return flatten_batch(instance_or_batch, separator, prefix, model)
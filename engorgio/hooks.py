@@ -0,0 +1,209 @@
+"""Timing events for decorating and calling engorgio functions.
+
+Register a hook, any callable that takes an Event, to find out where the time
+goes.
+
+Decoration stages:
+
+* `flatten`: building the condense plan from the cached model schemas.
+* `annotate`: creating the flat parameters or annotations.
+* `codegen`: rendering the source of the new function, black and pyflyby
+  for the exec backend.
+* `compile`: compiling, exec'ing, or building the new function.
+
+Per call stages, for the expanded function, `.map`, `.batch`, and `.amap`:
+
+* `condense`: sorting the flat kwargs into their models.
+* `construct`: building, and validating, the model instances.
+* `call`: running the decorated function.
+
+With no hooks registered each call only checks that the hook list is empty.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Tuple
+
+__all__ = [
+    "Aggregator",
+    "Event",
+    "JsonExporter",
+    "add_hook",
+    "remove_hook",
+]
+
+
+class Event(NamedTuple):
+
+    """One timed stage, times are `time.perf_counter_ns` nanoseconds."""
+
+    function: str
+    stage: str
+    start_ns: int
+    duration_ns: int
+
+
+Hook = Callable[[Event], Any]
+
+# shared with every wrapper, so registering a hook reaches functions that are
+# already decorated
+HOOKS: List[Hook] = []
+
+
+def add_hook(hook: Hook) -> Hook:
+    """Send every Event to hook, returning it so it can be used as a decorator."""
+    HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    """Stop sending Events to hook."""
+    HOOKS.remove(hook)
+
+
+def emit(function: str, stage: str, start_ns: int) -> None:
+    """Send an Event for a stage that started at start_ns to every hook."""
+    end_ns = perf_counter_ns()
+    event = Event(function, stage, start_ns, end_ns - start_ns)
+    for hook in HOOKS:
+        hook(event)
+
+
+@contextmanager
+def timed(function: str, stage: str) -> Iterator[None]:
+    """Time the block as stage of function, when any hook is registered."""
+    if not HOOKS:
+        yield
+        return
+    start_ns = perf_counter_ns()
+    yield
+    emit(function, stage, start_ns)
+
+
+def condense_timed(
+    function: str,
+    plan: Any,
+    kwargs: Dict[str, Any],
+    *,
+    construct: bool = False,
+) -> Dict[str, Any]:
+    """Condense kwargs with plan, emitting the condense and construct stages."""
+    start_ns = perf_counter_ns()
+    condensed, values, missing = plan.collect(kwargs)
+    emit(function, "condense", start_ns)
+    start_ns = perf_counter_ns()
+    condensed = plan.assemble(condensed, values, missing, construct=construct)
+    emit(function, "construct", start_ns)
+    return condensed
+
+
+def call_timed(  # noqa: PLR0913
+    function: str,
+    func: Callable,
+    plan: Any,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    *,
+    construct: bool = False,
+) -> Any:
+    """Condense kwargs and call func, emitting every per call stage."""
+    kwargs = condense_timed(function, plan, kwargs, construct=construct)
+    start_ns = perf_counter_ns()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        emit(function, "call", start_ns)
+
+
+async def acall_timed(  # noqa: PLR0913
+    function: str,
+    func: Callable,
+    plan: Any,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    *,
+    construct: bool = False,
+) -> Any:
+    """Condense kwargs and await func, emitting every per call stage."""
+    kwargs = condense_timed(function, plan, kwargs, construct=construct)
+    start_ns = perf_counter_ns()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        emit(function, "call", start_ns)
+
+
+def function_name(func: Callable) -> str:
+    """Name func the way Events do."""
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def percentile(ordered: List[int], fraction: float) -> int:
+    """Get the nearest rank percentile of an ordered list."""
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Aggregator:
+
+    """A hook that keeps recent durations and reports p50 and p99.
+
+    Keeps the last maxlen durations of each function and stage.
+    """
+
+    def __init__(self, maxlen: int = 10_000) -> None:
+        """Create an empty Aggregator."""
+        self.maxlen = maxlen
+        self.durations: Dict[Tuple[str, str], Deque[int]] = {}
+
+    def __call__(self, event: Event) -> None:
+        """Record the duration of event."""
+        key = (event.function, event.stage)
+        durations = self.durations.get(key)
+        if durations is None:
+            # setdefault, so threads racing on a new key share one deque
+            durations = self.durations.setdefault(key, deque(maxlen=self.maxlen))
+        durations.append(event.duration_ns)
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Get count, p50_ns, and p99_ns for each stage of each function."""
+        report: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for (function, stage), durations in self.durations.items():
+            ordered = sorted(durations)
+            report.setdefault(function, {})[stage] = {
+                "count": len(ordered),
+                "p50_ns": percentile(ordered, 0.5),
+                "p99_ns": percentile(ordered, 0.99),
+            }
+        return report
+
+    def clear(self) -> None:
+        """Forget every duration."""
+        self.durations.clear()
+
+
+class JsonExporter:
+
+    """A hook that keeps every Event and writes them out as JSON."""
+
+    def __init__(self) -> None:
+        """Create an empty JsonExporter."""
+        self.events: List[Event] = []
+
+    def __call__(self, event: Event) -> None:
+        """Keep event."""
+        self.events.append(event)
+
+    def dump(self, fp: IO[str]) -> None:
+        """Write the events to fp as a JSON list of objects."""
+        import json
+
+        json.dump([event._asdict() for event in self.events], fp)
+
+    def clear(self) -> None:
+        """Forget every event."""
+        self.events.clear()
@@ -0,0 +1,68 @@
+"""Defer expanding functions until they are first used.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyFunction:
+
+    """A lightweight stand in for an expanded function.
+
+    Holds onto func and the expand callable until the first call, signature
+    lookup, or attribute access, then caches the expanded function and
+    forwards everything to it. Threads that first use it at the same time
+    all get the one expanded function.
+    """
+
+    def __init__(self, func: Callable, expand: Callable[[], Callable]) -> None:
+        """Store the expand callable without calling it."""
+        self.func = func
+        self._expand: Optional[Callable[[], Callable]] = expand
+        self._expanded: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+        self.__module__ = func.__module__
+        self.__doc__ = func.__doc__
+
+    @property
+    def expanded(self) -> Callable:
+        """The expanded function, created on first access."""
+        expanded = self._expanded
+        if expanded is None:
+            with self._lock:
+                if self._expanded is None:
+                    self._expanded = self._expand()
+                    self._expand = None
+                expanded = self._expanded
+        return expanded
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        """Signature of the expanded function."""
+        return inspect.signature(self.expanded)
+
+    @property
+    def __annotations__(self) -> Dict[str, Any]:
+        """Annotations of the expanded function, used by typer."""
+        return self.expanded.__annotations__
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward anything else to the expanded function."""
+        if name.startswith("_expand"):
+            raise AttributeError(name)
+        return getattr(self.expanded, name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        """Call the expanded function."""
+        return self.expanded(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        """Show whether the function has been expanded yet."""
+        state = "expanded" if self._expanded is not None else "pending"
+        return f"<LazyFunction {self.__qualname__} ({state})>"
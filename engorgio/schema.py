@@ -0,0 +1,226 @@
+"""Flattened, cached field trees for models.
+
+Every expand and condense code path looks models up here instead of reading
+their fields on its own, so each model class is flattened once per separator.
+The fields of each kind of model are read by its adapter, see
+`engorgio.adapters`.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from engorgio.adapters import (
+    ModelAdapter,
+    create_default_value,
+    field_annotation,
+    get_adapter,
+)
+
+__all__ = [
+    "FieldSchema",
+    "ModelSchema",
+    "ModelSchemaCache",
+    "RecursiveModelError",
+    "create_default_value",
+    "field_annotation",
+    "flatten_model",
+    "is_model",
+    "is_optional_model",
+    "model_type",
+    "parameter_schema",
+    "schema_cache",
+]
+
+
+def is_model(annotation: Any) -> bool:
+    """Check if an annotation is a model engorgio can expand."""
+    return get_adapter(annotation) is not None
+
+
+def model_type(annotation: Any) -> Any:
+    """Get the model of a `Model` or `Optional[Model]` annotation, else None."""
+    if is_model(annotation):
+        return annotation
+    if getattr(annotation, "__origin__", None) is Union:
+        args = annotation.__args__
+        if len(args) == 2 and type(None) in args:  # noqa: PLR2004
+            model = args[0] if args[1] is type(None) else args[1]
+            if is_model(model):
+                return model
+    return None
+
+
+def is_optional_model(param: inspect.Parameter) -> bool:
+    """Check if param is an `Optional[Model]` that defaults to None.
+
+    Such a model is None unless one of its fields is set, so None means unset
+    for every one of them.
+    """
+    model = model_type(param.annotation)
+    return model is not None and model is not param.annotation and param.default is None
+
+
+class RecursiveModelError(ValueError):
+
+    """Raised when a model refers back to itself and cannot be expanded."""
+
+
+class FieldSchema(NamedTuple):
+
+    """A leaf field of a flattened model.
+
+    * `name`: the path joined with the model separator.
+    * `path`: field names from the model down to this field.
+    * `field`: the library's field object, such as a pydantic ModelField, or
+      inspect.Parameter for plain args.
+    * `default`: the default used in expanded signatures.
+    * `description`: the field description, None for plain args.
+    * `panel`: the typer help panel relative to the model.
+    """
+
+    name: str
+    path: Tuple[str, ...]
+    field: Any
+    annotation: Any
+    default: Any
+    description: Optional[str]
+    panel: str
+
+
+class ModelSchema(NamedTuple):
+
+    """A model flattened into its leaf fields.
+
+    * `fields`: leaf fields, the model's own fields first then each sub
+      model's fields in declaration order.
+    * `models`: `(path, model)` for the model and every sub model in
+      post-order, the model itself last with an empty path.
+    * `adapter`: the ModelAdapter that read the model.
+    * `source`: what `adapter.source` returned when the schema was built.
+    """
+
+    model: Any
+    fields: Tuple[FieldSchema, ...]
+    models: Tuple[Tuple[Tuple[str, ...], Any], ...]
+    adapter: ModelAdapter
+    source: Any
+
+
+def parameter_schema(param: inspect.Parameter) -> FieldSchema:
+    """Create a FieldSchema for a function argument that is not a model."""
+    return FieldSchema(
+        name=param.name,
+        path=(param.name,),
+        field=param,
+        annotation=param.annotation,
+        default=create_default_value(param),
+        description=None,
+        panel="",
+    )
+
+
+def flatten_model(model: Any, model_separator: str = "__") -> ModelSchema:
+    """Flatten model into a ModelSchema in one depth first pass.
+
+    Uses an explicit stack, so the cost is linear in the total number of
+    fields no matter how deep or wide the model is. Raises
+    RecursiveModelError if a model contains itself.
+    """
+    fields = []
+    visited: Dict[Tuple[str, ...], Any] = {}
+    active = set()
+    stack: List[Tuple[bool, Tuple[str, ...], Any]] = [(False, (), model)]
+    while stack:
+        leaving, path, current = stack.pop()
+        if leaving:
+            active.discard(current)
+            continue
+        if current in active:
+            chain = [visited[path[:i]].__name__ for i in range(len(path))]
+            msg = f"{' -> '.join([*chain, current.__name__])} is recursive"
+            raise RecursiveModelError(msg)
+        active.add(current)
+        visited[path] = current
+        stack.append((True, path, current))
+
+        panel = "--".join(path)
+        children = []
+        for field in get_adapter(current).fields(current):
+            field_path = (*path, field.name)
+            if is_model(field.annotation):
+                children.append((False, field_path, field.annotation))
+            else:
+                fields.append(
+                    FieldSchema(
+                        name=model_separator.join(field_path),
+                        path=field_path,
+                        field=field.field,
+                        annotation=field.annotation,
+                        default=field.default,
+                        description=field.description,
+                        panel=panel,
+                    ),
+                )
+        stack.extend(reversed(children))
+
+    adapter = get_adapter(model)
+    return ModelSchema(
+        model=model,
+        fields=tuple(fields),
+        models=tuple(reversed(visited.items())),
+        adapter=adapter,
+        source=adapter.source(model),
+    )
+
+
+class ModelSchemaCache:
+
+    """A bounded, least recently used cache of ModelSchema.
+
+    Keyed by the model class itself and the separator, so a redefined class
+    gets a fresh schema, and a class whose fields are replaced, such as
+    `__fields__`, is rebuilt.
+
+    Safe to share between threads, schemas are built outside the lock so two
+    threads may build the same one, and the last one built is kept.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        """Create an empty cache holding up to maxsize schemas."""
+        self.maxsize = maxsize
+        self._schemas: OrderedDict[Tuple[Any, str], ModelSchema] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached schemas."""
+        return len(self._schemas)
+
+    def clear(self) -> None:
+        """Drop every cached schema."""
+        with self._lock:
+            self._schemas.clear()
+
+    def get(self, model: Any, model_separator: str = "__") -> ModelSchema:
+        """Get the ModelSchema for model, building it if needed."""
+        key = (model, model_separator)
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is not None and schema.source is schema.adapter.source(model):
+                self._schemas.move_to_end(key)
+                return schema
+
+        schema = flatten_model(model, model_separator)
+        with self._lock:
+            self._schemas[key] = schema
+            self._schemas.move_to_end(key)
+            while len(self._schemas) > self.maxsize:
+                self._schemas.popitem(last=False)
+        return schema
+
+
+schema_cache = ModelSchemaCache()
@@ -0,0 +1,303 @@
+"""Stream flat records between CSV or JSON lines files and engorgio functions.
+
+Column names use the same flat names as the expanded function, such as
+`person__hair__length`, so a file maps straight onto its arguments, and the
+records of `engorgio.flat.flatten` write straight back out.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import csv
+import itertools
+import json
+import sys
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from engorgio.config import CONFIG_OPTION
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+ERRORS = ("raise", "skip", "collect")
+
+Source = Union[str, Path, IO[str]]
+
+
+class RowError(NamedTuple):
+
+    """A record that failed, kept when streaming with `errors="collect"`.
+
+    `record` is the raw csv row or json line when it could not be parsed.
+    """
+
+    row: int
+    record: Any
+    error: Exception
+
+
+class BadRecord(NamedTuple):
+
+    """A csv row or json line that could not be parsed, see `read_records`."""
+
+    raw: Any
+    error: Exception
+
+
+def get_format(source: Source, format_: Optional[str] = None) -> str:
+    """Get the record format from format_ or the file extension of source."""
+    if format_ is None and isinstance(source, (str, Path)) and str(source) != "-":
+        format_ = FORMATS.get(Path(source).suffix.lower())
+    if format_ is None and str(source).lower().endswith(".json"):
+        msg = (
+            f"cannot stream {source!r}, records are read from json lines files "
+            "with one object per line, pass format_='jsonl' if it is one"
+        )
+        raise ValueError(msg)
+    if format_ is None:
+        msg = f"cannot tell the format of {source!r}, pass format='csv' or 'jsonl'"
+        raise ValueError(msg)
+    format_ = "jsonl" if format_ == "ndjson" else format_
+    if format_ not in ("csv", "jsonl"):
+        msg = f"unknown format {format_!r}, expected 'csv', 'jsonl', or 'ndjson'"
+        raise ValueError(msg)
+    return format_
+
+
+def read_csv(
+    handle: IO[str],
+    names: Optional[Collection[str]] = None,
+    *,
+    strict: bool = True,
+) -> Iterator[Union[Dict[str, Any], BadRecord]]:
+    """Read flat records from a csv file.
+
+    Only columns in names are kept when given, and empty cells are left out
+    so the field falls back to its default. Rows with a different number of
+    cells than the header raise a ValueError, or are yielded as a BadRecord
+    when not strict.
+    """
+    reader = csv.reader(handle)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [
+        (index, name)
+        for index, name in enumerate(header)
+        if names is None or name in names
+    ]
+    for row in reader:
+        if len(row) != len(header):
+            error = ValueError(
+                f"line {reader.line_num} has {len(row)} cells, "
+                f"the header has {len(header)}",
+            )
+            if strict:
+                raise error
+            yield BadRecord(row, error)
+            continue
+        yield {name: row[index] for index, name in columns if row[index] != ""}
+
+
+def parse_line(line: str) -> Dict[str, Any]:
+    """Parse one line of a json lines file into a record."""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        msg = f"expected a json object per line, got {line.strip()!r}"
+        raise ValueError(msg)  # noqa: TRY004
+    return record
+
+
+def read_jsonl(
+    handle: IO[str],
+    names: Optional[Collection[str]] = None,
+    *,
+    strict: bool = True,
+) -> Iterator[Union[Dict[str, Any], BadRecord]]:
+    """Read flat records from a json lines file, one object per line.
+
+    Lines that are not a json object raise a ValueError, or are yielded as a
+    BadRecord when not strict.
+    """
+    for line in handle:
+        if not line.strip():
+            continue
+        try:
+            record = parse_line(line)
+        except ValueError as error:
+            if strict:
+                raise
+            yield BadRecord(line, error)
+            continue
+        if names is not None:
+            record = {name: value for name, value in record.items() if name in names}
+        yield record
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+def read_records(
+    source: Source,
+    format_: Optional[str] = None,
+    names: Optional[Collection[str]] = None,
+    *,
+    strict: bool = True,
+) -> Iterator[Union[Dict[str, Any], BadRecord]]:
+    """Lazily read flat records from a path, an open file, or "-" for stdin.
+
+    Records that cannot be parsed raise a ValueError, or are yielded as a
+    BadRecord when not strict, so reading can carry on past them.
+    """
+    reader = READERS[get_format(source, format_)]
+    if isinstance(source, (str, Path)) and str(source) == "-":
+        yield from reader(sys.stdin, names, strict=strict)
+    elif isinstance(source, (str, Path)):
+        with Path(source).open(newline="") as handle:
+            yield from reader(handle, names, strict=strict)
+    else:
+        yield from reader(source, names, strict=strict)
+
+
+def write_csv(handle: IO[str], records: Iterable[Dict[str, Any]]) -> int:
+    """Write flat records to a csv file, one row at a time.
+
+    The header is taken from the first record, None is written as an empty
+    cell so it reads back as the default.
+    """
+    writer = csv.writer(handle)
+    count = 0
+    names: List[str] = []
+    for record in records:
+        if not count:
+            names = list(record)
+            writer.writerow(names)
+        writer.writerow(
+            ["" if record.get(name) is None else record[name] for name in names],
+        )
+        count += 1
+    return count
+
+
+def write_jsonl(handle: IO[str], records: Iterable[Dict[str, Any]]) -> int:
+    """Write flat records to a json lines file, one object per line."""
+    count = 0
+    for record in records:
+        handle.write(json.dumps(record, default=str))
+        handle.write("\n")
+        count += 1
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+def write_records(
+    records: Iterable[Dict[str, Any]],
+    target: Source,
+    format_: Optional[str] = None,
+) -> int:
+    """Write flat records to a path, an open file, or "-" for stdout.
+
+    Records are written as they are iterated, so a generator such as the one
+    from `engorgio.flat.flatten` is never held in memory. Returns the number
+    of records written.
+    """
+    writer = WRITERS[get_format(target, format_)]
+    if isinstance(target, (str, Path)) and str(target) == "-":
+        return writer(sys.stdout, records)
+    if isinstance(target, (str, Path)):
+        with Path(target).open("w", newline="") as handle:
+            return writer(handle, records)
+    return writer(target, records)
+
+
+class RecordStream:
+
+    """Lazily call an engorgio function with every record in a file.
+
+    Records are read `chunksize` at a time, so memory stays flat no matter
+    the size of the file. `errors` decides what happens when a record fails
+    to parse or to call, "raise" re-raises, "skip" drops it, and "collect"
+    drops it and keeps a RowError in `errors`. `progress` is called with the
+    number of records read after each chunk. Records are filled from the
+    config file and the environment just as calls of the function are.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        func: Callable,
+        source: Source,
+        *,
+        format_: Optional[str] = None,
+        errors: str = "raise",
+        progress: Optional[Callable[[int], Any]] = None,
+        chunksize: int = 1000,
+        construct: bool = False,
+    ) -> None:
+        """Set up the stream, nothing is read until it is iterated."""
+        if errors not in ERRORS:
+            msg = f"unknown errors {errors!r}, expected one of {ERRORS}"
+            raise ValueError(msg)
+        self.expansion = func.__engorgio__
+        self.source = source
+        self.format = get_format(source, format_)
+        self.on_error = errors
+        self.progress = progress
+        self.chunksize = chunksize
+        self.construct = construct
+        self.errors: List[RowError] = []
+
+    def __iter__(self) -> Iterator[Any]:
+        """Yield the result of calling the function with each record."""
+        func = self.expansion.func
+        plan = self.expansion.plan
+        condense = self.expansion.condense
+        names = {*plan.params, *plan.slots}
+        if self.expansion.config_option:
+            names.add(CONFIG_OPTION)
+        records = read_records(self.source, self.format, names=names, strict=False)
+        row = 0
+        while True:
+            chunk = list(itertools.islice(records, self.chunksize))
+            if not chunk:
+                return
+            for record in chunk:
+                row += 1
+                if isinstance(record, BadRecord):
+                    self.fail(RowError(row, *record))
+                    continue
+                try:
+                    result = func(**condense(record, construct=self.construct))
+                except Exception as error:  # noqa: BLE001
+                    self.fail(RowError(row, record, error))
+                    continue
+                yield result
+            if self.progress is not None:
+                self.progress(row)
+
+    def fail(self, failure: RowError) -> None:
+        """Raise, skip, or collect a record that failed, as `errors` says."""
+        if self.on_error == "raise":
+            raise failure.error
+        if self.on_error == "collect":
+            self.errors.append(failure)
+
+
+def stream(func: Callable, source: Source, **kwargs: Any) -> RecordStream:
+    """Stream records from source into the engorgio function func.
+
+    Accepts the same keyword arguments as RecordStream.
+    """
+    return RecordStream(func, source, **kwargs)
@@ -4,3 +4,11 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 
 SPDX-License-Identifier: MIT
 """
+import pydantic
+import pytest
+
+# the exec backend and make_annotation render pydantic v1 fields as source
+requires_pydantic_v1 = pytest.mark.skipif(
+    not pydantic.VERSION.startswith("1."),
+    reason="the exec backend only expands pydantic v1 models",
+)
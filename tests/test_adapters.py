@@ -0,0 +1,199 @@
+"""Tests for expanding dataclasses, attrs classes, and TypedDicts.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import dataclasses
+import inspect
+import sys
+from typing import List
+
+import attr
+import pytest
+from typing_extensions import TypedDict
+
+from engorgio import engorgio
+from engorgio.adapters import (
+    MISSING,
+    DataclassAdapter,
+    ModelAdapter,
+    get_adapter,
+    register_adapter,
+    unregister_adapter,
+)
+from engorgio.codegen import generate
+from engorgio.schema import schema_cache
+from tests import models
+
+
+# slots needs python 3.10
+@dataclasses.dataclass(**({"slots": True} if sys.version_info >= (3, 10) else {}))
+class Point:
+    x: int
+    y: int = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class Shape:
+    name: str
+    origin: Point
+    tags: List[str] = dataclasses.field(default_factory=list)
+
+
+@attr.define
+class Pen:
+    color: str
+    _width: int = 1
+
+
+@attr.define
+class Drawing:
+    shape: Shape
+    pen: Pen
+
+
+class Label(TypedDict, total=False):
+    text: str
+    size: int
+
+
+def get_shape(shape: Shape) -> Shape:
+    """Get a shape."""
+    return shape
+
+
+def get_drawing(drawing: Drawing) -> Drawing:
+    """Get a drawing."""
+    return drawing
+
+
+def get_label(label: Label) -> Label:
+    """Get a label."""
+    return label
+
+
+def test_dataclass_with_slots() -> None:
+    expanded = engorgio()(get_shape)
+    assert list(inspect.signature(expanded).parameters) == [
+        "shape__name",
+        "shape__origin__x",
+        "shape__tags",
+        "shape__origin__y",
+    ]
+    assert expanded("square", 1) == Shape(name="square", origin=Point(x=1))
+    assert expanded("square", 1, shape__tags=["a"]).tags == ["a"]
+
+
+def test_dataclass_missing_field() -> None:
+    with pytest.raises(TypeError, match="shape__origin__x"):
+        engorgio()(get_shape)(shape__name="square")
+
+
+def test_dataclass_passthrough() -> None:
+    shape = Shape(name="square", origin=Point(x=1))
+    assert engorgio()(get_shape)(shape=shape) is shape
+
+
+@pytest.mark.parametrize("validate", ["full", "outer", "none"])
+def test_attrs(validate: str) -> None:
+    expanded = engorgio(validate=validate)(get_drawing)
+    assert "drawing__pen__width" in inspect.signature(expanded).parameters
+    drawing = expanded(
+        drawing__shape__name="line",
+        drawing__shape__origin__x=2,
+        drawing__pen__color="red",
+        drawing__pen__width=3,
+    )
+    assert drawing == Drawing(
+        shape=Shape(name="line", origin=Point(x=2)),
+        pen=Pen(color="red", width=3),
+    )
+
+
+def test_typeddict() -> None:
+    expanded = engorgio()(get_label)
+    assert expanded(label__text="hi") == {"text": "hi"}
+    assert expanded(label={"text": "hi", "size": 2}) == {"text": "hi", "size": 2}
+
+
+def test_mixed_with_pydantic() -> None:
+    def get_both(hero: models.Hero, shape: Shape) -> tuple:
+        return hero, shape
+
+    hero, shape = engorgio()(get_both)(
+        hero__name="Link",
+        hero__pet__name="Epona",
+        shape__name="dot",
+        shape__origin__x=0,
+    )
+    assert hero.pet.name == "Epona"
+    assert shape.origin == Point(x=0)
+
+
+def test_batch_dataclass() -> None:
+    expanded = engorgio()(get_shape)
+    records = [{"shape__name": str(i), "shape__origin__x": i} for i in range(3)]
+    assert [shape.origin.x for shape in expanded.batch(records)] == [0, 1, 2]
+
+
+def test_exec_backend_needs_pydantic() -> None:
+    with pytest.raises(TypeError, match="only expands pydantic v1"):
+        engorgio(backend="exec")(get_shape)
+
+
+def test_schema_defaults() -> None:
+    fields = {field.name: field for field in schema_cache.get(Shape).fields}
+    assert fields["name"].default is inspect.Parameter.empty
+    assert fields["origin__y"].default == 0
+    assert fields["tags"].default is MISSING
+
+
+def test_register_adapter() -> None:
+    class Plain:
+        def __init__(self, value: int) -> None:
+            self.value = value
+
+    class PlainAdapter(DataclassAdapter):
+        def matches(self, annotation) -> bool:
+            return annotation is Plain
+
+        def fields(self, model):  # noqa: ARG002
+            return DataclassAdapter().fields(dataclasses.make_dataclass("P", ["value"]))
+
+        def source(self, model):
+            return model.__init__
+
+    assert get_adapter(Plain) is None
+    adapter = PlainAdapter()
+    register_adapter(adapter)
+    try:
+        assert get_adapter(Plain) is adapter
+
+        def get_plain(plain: Plain) -> Plain:
+            return plain
+
+        assert engorgio()(get_plain)(plain__value=1).value == 1
+    finally:
+        unregister_adapter(adapter)
+    assert get_adapter(Plain) is None
+    assert isinstance(get_adapter(Shape), ModelAdapter)
+
+
+def test_codegen_dataclass(tmp_path, monkeypatch) -> None:
+    module = tmp_path / "shapes.py"
+    module.write_text(
+        "from engorgio import engorgio\n"
+        "from tests.test_adapters import Shape\n\n\n"
+        "@engorgio()\n"
+        "def get_shape(shape: Shape) -> Shape:\n"
+        "    return shape\n",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    generated = tmp_path / "shapes_generated.py"
+    generated.write_text(generate("shapes"))
+
+    import shapes_generated  # noqa: PLC0415
+
+    assert shapes_generated.get_shape("dot", 1) == Shape(name="dot", origin=Point(x=1))
+    assert shapes_generated.get_shape("dot", 1, shape__tags=["a"]).tags == ["a"]
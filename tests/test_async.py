@@ -0,0 +1,65 @@
+"""Tests for expanding async functions.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import asyncio
+import inspect
+
+import pytest
+
+from engorgio import engorgio
+from tests import models, requires_pydantic_v1
+
+
+@pytest.mark.parametrize(
+    "backend",
+    ["signature", pytest.param("exec", marks=requires_pydantic_v1)],
+)
+def test_async_expanded(backend) -> None:
+    @engorgio(backend=backend)
+    async def get_hero(hero: models.Hero) -> models.Hero:
+        """Mydocstring."""
+        await asyncio.sleep(0)
+        return hero
+
+    assert inspect.iscoroutinefunction(get_hero)
+    params = inspect.signature(get_hero).parameters
+    assert "hero__name" in params
+    assert "hero__pet__name" in params
+
+    hero = models.HeroFactory().build()
+    result = asyncio.run(
+        get_hero(hero__name=hero.name, hero__pet__name=hero.pet.name),
+    )
+    assert result == hero
+
+
+def test_amap_bounded() -> None:
+    running = 0
+    peak = 0
+
+    @engorgio()
+    async def get_alpha(alpha: models.Alpha) -> int:
+        """Mydocstring."""
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return alpha.a
+
+    records = [{"alpha__a": i} for i in range(20)]
+    results = asyncio.run(get_alpha.amap(records, concurrency=3))
+    assert results == list(range(20))
+    assert peak == 3
+
+
+def test_sync_has_no_amap() -> None:
+    @engorgio()
+    def get_alpha(alpha: models.Alpha) -> int:
+        """Mydocstring."""
+        return alpha.a
+
+    assert not hasattr(get_alpha, "amap")
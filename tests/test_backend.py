@@ -0,0 +1,86 @@
+"""Both expansion backends build the same signature.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+
+import pytest
+from pydantic import create_model
+
+from engorgio import engorgio
+from tests import models, requires_pydantic_v1
+
+
+def get_person(person: models.Person) -> models.Person:
+    """Mydocstring."""
+    return person
+
+
+def get_hero(hero: models.Hero) -> models.Hero:
+    """Mydocstring."""
+    return hero
+
+
+def get_alpha(alpha: str = "hello") -> str:
+    """Mydocstring."""
+    return alpha
+
+
+def describe(func):
+    return [
+        (param.name, param.kind, param.annotation, param.default)
+        for param in inspect.signature(func).parameters.values()
+    ]
+
+
+@requires_pydantic_v1
+@pytest.mark.parametrize("func", [get_person, get_hero, get_alpha])
+@pytest.mark.parametrize("include_parent_model", [True, False])
+def test_backends_match(func, include_parent_model) -> None:
+    expanded = engorgio(include_parent_model=include_parent_model)(func)
+    legacy = engorgio(include_parent_model=include_parent_model, backend="exec")(
+        func,
+    )
+    assert describe(expanded) == describe(legacy)
+    assert expanded.__name__ == func.__name__
+    assert expanded.__doc__ == func.__doc__
+
+
+@requires_pydantic_v1
+@pytest.mark.parametrize("func", [get_person, get_hero])
+def test_backends_match_typer(func) -> None:
+    expanded = engorgio(typer=True)(func)
+    legacy = engorgio(typer=True, backend="exec")(func)
+    expanded_params = inspect.signature(expanded).parameters.values()
+    legacy_params = inspect.signature(legacy).parameters.values()
+    for param, legacy_param in zip(expanded_params, legacy_params):
+        assert param.name == legacy_param.name
+        assert param.annotation == legacy_param.annotation
+        assert vars(param.default) == vars(legacy_param.default)
+
+
+def test_signature_backend_call() -> None:
+    hero = models.HeroFactory().build()
+    get = engorgio()(get_hero)
+    assert get(hero.name, hero.pet.name) == hero
+    with pytest.raises(TypeError):
+        get(hero__name=hero.name)
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(ValueError, match="unknown backend"):
+        engorgio(backend="nope")(get_hero)
+
+
+def test_wide_model_call() -> None:
+    wide = create_model("Wide", **{f"field_{i}": (int, ...) for i in range(300)})
+
+    @engorgio()
+    def get_wide(wide: wide) -> wide:
+        """Mydocstring."""
+        return wide
+
+    kwargs = {f"wide__field_{i}": i for i in range(300)}
+    assert get_wide(**kwargs) == wide(**{f"field_{i}": i for i in range(300)})
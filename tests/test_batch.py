@@ -0,0 +1,148 @@
+"""Tests for calling engorgio functions over many records.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import types
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+from engorgio import engorgio
+from engorgio.adapters import MISSING
+from tests import models
+
+
+@engorgio()
+def get_hero(hero: models.Hero, greeting: str = "hi") -> str:
+    """Mydocstring."""
+    return f"{greeting} {hero.name} and {hero.pet.name}"
+
+
+def test_map_is_lazy() -> None:
+    results = get_hero.map([{"hero__name": "Link", "hero__pet__name": "Epona"}])
+    assert isinstance(results, types.GeneratorType)
+    assert list(results) == ["hi Link and Epona"]
+
+
+def test_batch() -> None:
+    heroes = models.HeroFactory().batch(size=5)
+    records = [
+        {"hero__name": hero.name, "hero__pet__name": hero.pet.name, "greeting": "yo"}
+        for hero in heroes
+    ]
+    assert get_hero.batch(records) == [
+        f"yo {hero.name} and {hero.pet.name}" for hero in heroes
+    ]
+
+
+def test_batch_validates() -> None:
+    with pytest.raises(ValidationError):
+        get_hero.batch([{"hero__name": "Link"}])
+
+
+def test_batch_construct() -> None:
+    @engorgio()
+    def get_person(person: models.Person) -> models.Person:
+        """Mydocstring."""
+        return person
+
+    person = models.PersonFactory().build()
+    record = {
+        f"person__{name}": value
+        for name, value in person.dict(exclude={"hair"}).items()
+    }
+    record.update(
+        {
+            "person__hair__length": person.hair.length,
+            "person__hair__color__r": person.hair.color.r,
+            "person__hair__color__g": person.hair.color.g,
+            "person__hair__color__b": person.hair.color.b,
+            "person__hair__color__alpha__a": person.hair.color.alpha.a,
+        },
+    )
+    assert get_person.batch([record], construct=True) == [person]
+    assert get_person.batch([record]) == [person]
+
+
+def test_condense_many_matches_condense() -> None:
+    @engorgio()
+    def get_hero(hero: models.Hero, greeting: str = "hi") -> models.Hero:
+        """Mydocstring."""
+        return hero
+
+    plan = get_hero.__engorgio__.plan
+    hero = models.HeroFactory().build()
+    records = [
+        {"hero__name": "Link", "hero__pet__name": "Epona"},
+        {"hero__pet__name": "Epona", "greeting": "yo", "hero__name": "Link"},
+        {"hero__pet__name": "Epona", "greeting": "yo", "hero__name": "Zelda"},
+        {"hero__name": "Link", "hero__pet__name": "Epona", "greeting": MISSING},
+        {"hero": hero, "unused": 1},
+        {},
+    ]
+    assert list(plan.condense_many(records, construct=True)) == [
+        plan.condense(record, construct=True) for record in records
+    ]
+    assert len(plan.rows) == len(records) - 1
+
+
+def test_condense_many_survives_a_concurrent_clear() -> None:
+    class Cleared(dict):
+
+        """Cleared by another thread as soon as anything is stored."""
+
+        def __setitem__(self, key: Any, value: Any) -> None:
+            super().__setitem__(key, value)
+            self.clear()
+
+    plan = get_hero.__engorgio__.plan._replace(rows=Cleared())
+    records = [{"hero__name": "Link", "hero__pet__name": "Epona"}]
+    assert list(plan.condense_many(records)) == [plan.condense(records[0])]
+
+
+def test_batch_mixed_keys() -> None:
+    records = [
+        {"hero__name": "Link", "hero__pet__name": "Epona"},
+        {"greeting": "yo", "hero__pet__name": "Yoshi", "hero__name": "Mario"},
+        {"hero__name": "Zelda", "hero__pet__name": "Epona", "greeting": MISSING},
+    ]
+    assert get_hero.batch(records) == [
+        "hi Link and Epona",
+        "yo Mario and Yoshi",
+        "hi Zelda and Epona",
+    ]
+
+
+def test_lazy_batch() -> None:
+    @engorgio(lazy=True)
+    def get_alpha(alpha: models.Alpha) -> int:
+        """Mydocstring."""
+        return alpha.a
+
+    assert get_alpha.batch([{"alpha__a": 1}, {"alpha__a": "2"}]) == [1, 2]
+
+
+@engorgio()
+def double_alpha(alpha: models.Alpha) -> models.Alpha:
+    """Mydocstring."""
+    return models.Alpha(a=alpha.a * 2)
+
+
+def test_pmap() -> None:
+    records = [{"alpha__a": i} for i in range(50)]
+    results = double_alpha.pmap(records, workers=2, chunksize=7)
+    assert isinstance(results, types.GeneratorType)
+    assert [alpha.a for alpha in results] == [i * 2 for i in range(50)]
+
+
+def test_pmap_local_function() -> None:
+    @engorgio()
+    def get_alpha(alpha: models.Alpha) -> models.Alpha:
+        """Mydocstring."""
+        return alpha
+
+    with pytest.raises(TypeError, match="top level"):
+        list(get_alpha.pmap([{"alpha__a": 1}]))
@@ -0,0 +1,123 @@
+import importlib.util
+import inspect
+from typing import Optional
+
+import pytest
+
+from engorgio import engorgio
+from engorgio.cli import main
+from engorgio.codegen import generate, render_function
+from examples import person, person_cli
+from tests import models
+
+
+def load(path):
+    spec = importlib.util.spec_from_file_location("generated", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_generated_module_matches_runtime(tmp_path):
+    path = tmp_path / "person_generated.py"
+    path.write_text(generate("examples.person"))
+    generated = load(path)
+
+    assert inspect.signature(generated.get_person) == inspect.signature(
+        person.get_person,
+    )
+    assert generated.get_person.__doc__ == person.get_person.__doc__
+    assert generated.get_hero("hero", "dog") == person.get_hero("hero", "dog")
+
+
+def test_generated_typer_defaults(tmp_path):
+    path = tmp_path / "person_cli_generated.py"
+    path.write_text(generate("examples.person_cli"))
+    generated = load(path)
+
+    expected = inspect.signature(person_cli.get_person).parameters
+    actual = inspect.signature(generated.get_person).parameters
+    assert list(actual) == list(expected)
+    for name, param in actual.items():
+        assert param.annotation == expected[name].annotation
+        option, expected_option = param.default, expected[name].default
+        assert type(option) is type(expected_option)
+        if isinstance(option, str) or option is inspect.Parameter.empty:
+            assert option == expected_option
+            continue
+        for attr in ("default", "help", "rich_help_panel", "prompt"):
+            assert getattr(option, attr) == getattr(expected_option, attr)
+
+
+def test_compile_check(tmp_path, capsys):
+    path = tmp_path / "person_generated.py"
+    assert main(["compile", "examples.person", "--check", "-o", str(path)]) == 1
+
+    assert main(["compile", "examples.person", "-o", str(path)]) == 0
+    assert main(["compile", "examples.person", "--check", "-o", str(path)]) == 0
+
+    path.write_text(path.read_text() + "\n# edited\n")
+    assert main(["compile", "examples.person", "--check", "-o", str(path)]) == 1
+    assert "out of date" in capsys.readouterr().err
+
+
+def test_compile_stdout(capsys):
+    assert main(["compile", "examples.person"]) == 0
+    assert "def get_person(" in capsys.readouterr().out
+
+
+def test_same_module_model(tmp_path, monkeypatch):
+    module = tmp_path / "cgmod.py"
+    module.write_text(
+        "from pydantic import BaseModel\n\n"
+        "from engorgio import engorgio\n\n\n"
+        "class Cfg(BaseModel):\n"
+        "    name: str\n\n\n"
+        "@engorgio()\n"
+        "def fast(cfg: Cfg) -> Cfg:\n"
+        "    return cfg\n",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "cgmod_generated.py"
+    path.write_text(generate("cgmod"))
+    generated = load(path)
+
+    import cgmod  # noqa: PLC0415
+
+    assert generated.fast(cfg__name="a") == cgmod.Cfg(name="a")
+
+
+def test_trusted_uses_model_defaults(tmp_path, monkeypatch):
+    module = tmp_path / "cgtrusted.py"
+    module.write_text(
+        "from pydantic import BaseModel\n\n"
+        "from engorgio import engorgio\n\n\n"
+        "class Cfg(BaseModel):\n"
+        "    name: str\n"
+        "    retries: int = 3\n"
+        "    debug: bool = False\n\n\n"
+        "@engorgio(trusted=True)\n"
+        "def run(cfg: Cfg) -> Cfg:\n"
+        "    return cfg\n",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "cgtrusted_generated.py"
+    path.write_text(generate("cgtrusted"))
+    generated = load(path)
+
+    import cgtrusted  # noqa: PLC0415
+
+    cfg = generated.run(cfg__name="x")
+    assert cfg == cgtrusted.run(cfg__name="x")
+    assert type(cfg.retries) is int
+    assert cfg.debug is False
+    assert generated.run(cfg__name="x", cfg__retries=5).retries == 5
+
+
+def test_optional_model_is_rejected():
+    @engorgio()
+    def get_alpha(alpha: Optional[models.Alpha] = None):
+        return alpha
+
+    with pytest.raises(ValueError, match="Optional model"):
+        render_function("get_alpha", get_alpha, set())
@@ -0,0 +1,169 @@
+"""Tests for building click commands with prebuilt, cached options.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+
+import dataclasses
+import time
+from typing import Any, Dict, List
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks.synthetic import make_function, make_model
+from engorgio import command, engorgio
+from engorgio.command import make_command, model_options
+from tests import models
+
+HELP_BUDGET_S = 0.1
+
+
+def get_hero(hero: models.Hero, greeting: str = "hi") -> models.Hero:
+    """Get a hero."""
+    return hero
+
+
+@pytest.fixture()
+def runner() -> CliRunner:
+    return CliRunner()
+
+
+def test_make_command_builds_the_model(runner: CliRunner) -> None:
+    seen: List[Dict[str, Any]] = []
+
+    def greet(hero: models.Hero, greeting: str = "hi") -> None:
+        """Greet a hero."""
+        seen.append({"hero": hero, "greeting": greeting})
+
+    command = make_command(greet)
+    result = runner.invoke(
+        command,
+        ["--hero--name", "Link", "--hero--pet--name", "Epona"],
+    )
+    assert result.exit_code == 0, result.output
+    assert seen == [
+        {
+            "hero": models.Hero(name="Link", pet=models.Pet(name="Epona")),
+            "greeting": "hi",
+        },
+    ]
+
+
+def test_missing_required_option(runner: CliRunner) -> None:
+    result = runner.invoke(make_command(get_hero), ["--hero--name", "Link"])
+    assert result.exit_code == 2
+    assert "--hero--pet--name" in result.output
+
+
+def test_help_shows_panels(runner: CliRunner) -> None:
+    result = runner.invoke(make_command(get_hero), ["--help"])
+    assert result.exit_code == 0
+    assert "hero:" in result.output
+    assert "hero--pet:" in result.output
+    assert "The pet's name." in result.output
+    assert "--greeting TEXT  [default: hi]" in result.output
+    assert "--help-panel" not in result.output
+
+
+def test_lazy_panels(runner: CliRunner) -> None:
+    command = make_command(get_hero, lazy_panels=True)
+    result = runner.invoke(command, ["--help"])
+    assert result.exit_code == 0
+    assert "--hero--pet--name" not in result.output
+    assert "hero--pet  1 option" in result.output
+
+    result = runner.invoke(command, ["--help-panel", "hero--pet"])
+    assert result.exit_code == 0
+    assert "--hero--pet--name" in result.output
+    assert "--hero--name" not in result.output
+
+    result = runner.invoke(command, ["--help-panel", "all"])
+    assert "--hero--pet--name" in result.output
+    assert "--hero--name" in result.output
+
+
+def test_options_are_cached_per_model() -> None:
+    first = make_command(get_hero)
+    second = make_command(engorgio(model_separator="__")(get_hero))
+    assert first.params[0] is second.params[0]
+    assert model_options(models.Hero, "__", "hero") is model_options(
+        models.Hero,
+        "__",
+        "hero",
+    )
+
+
+def test_options_survive_a_concurrent_clear(monkeypatch: pytest.MonkeyPatch) -> None:
+    class Cleared(dict):
+
+        """Cleared by another thread as soon as anything is stored."""
+
+        def __setitem__(self, key: Any, value: Any) -> None:
+            super().__setitem__(key, value)
+            self.clear()
+
+    monkeypatch.setattr(command, "_options", Cleared())
+    options = model_options(models.Hero, "__", "hero")
+    assert [option.name for option in options] == ["hero__name", "hero__pet__name"]
+
+
+def test_without_parent_model(runner: CliRunner) -> None:
+    def get_person(person: models.Person) -> models.Person:
+        """Get a person."""
+        return person
+
+    command = make_command(engorgio(include_parent_model=False)(get_person))
+    result = runner.invoke(command, ["--help"])
+    assert "--length INTEGER" in result.output
+    assert "hair--color--alpha:" in result.output
+
+
+def test_dataclass_defaults(runner: CliRunner) -> None:
+    @dataclasses.dataclass
+    class Settings:
+        retries: int = 3
+        verbose: bool = False
+        tags: list = dataclasses.field(default_factory=list)
+
+    seen: List[Settings] = []
+
+    def run(settings: Settings) -> None:
+        seen.append(settings)
+
+    result = runner.invoke(make_command(run), ["--settings--verbose"])
+    assert result.exit_code == 0, result.output
+    assert seen == [Settings(retries=3, verbose=True, tags=[])]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--help"],
+        ["--help-panel", "config--child"],
+    ],
+)
+def test_help_with_300_flags_is_fast(runner: CliRunner, args: List[str]) -> None:
+    command = make_command(make_function(make_model(2, 160)))
+    assert len(command.params) > 300
+    start = time.perf_counter()
+    result = runner.invoke(command, args)
+    assert time.perf_counter() - start < HELP_BUDGET_S
+    assert result.exit_code == 0
+
+
+def test_completion_with_300_flags(runner: CliRunner) -> None:
+    command = make_command(make_function(make_model(2, 160)))
+    result = runner.invoke(
+        command,
+        [],
+        prog_name="handler",
+        env={
+            "_HANDLER_COMPLETE": "bash_complete",
+            "COMP_WORDS": "handler --config--child--field-15",
+            "COMP_CWORD": "1",
+        },
+    )
+    assert result.exit_code == 0
+    assert "--config--child--field-159" in result.output
@@ -0,0 +1,139 @@
+"""Tests for the precompiled condense plan.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+
+import pytest
+from pydantic import BaseModel
+from typing_extensions import TypedDict
+
+from engorgio.condense import (
+    condense_instances,
+    expand_param,
+    field_index,
+    get_kwargs_for_param,
+    make_condense_plan,
+)
+from engorgio.schema import RecursiveModelError
+from tests import models
+
+
+class Owner(BaseModel):
+    name: str
+    pet: models.Pet
+
+
+class Shelter(BaseModel):
+    name: str
+    pet: Owner
+
+
+def get_shelter(pet: Shelter) -> Shelter:
+    """Every level has a field called name, and two are called pet."""
+    return pet
+
+
+def get_hero(hero: models.Hero, thing: str = "this") -> models.Hero:
+    """Mydocstring."""
+    return hero
+
+
+def test_plan_slots_with_parent() -> None:
+    plan = make_condense_plan(get_hero)
+    assert set(plan.slots) == {"hero__name", "hero__pet__name"}
+    assert plan.params == frozenset({"hero", "thing"})
+
+
+def test_plan_slots_without_parent() -> None:
+    plan = make_condense_plan(get_hero, include_parent_model=False)
+    assert set(plan.slots) == {"name"}
+    assert len(plan.slots["name"]) == 2
+
+
+def test_plan_condense() -> None:
+    hero = models.HeroFactory().build()
+    plan = make_condense_plan(get_hero)
+    condensed = plan.condense(
+        {"hero__name": hero.name, "hero__pet__name": hero.pet.name, "thing": "that"},
+    )
+    assert condensed == {"hero": hero, "thing": "that"}
+
+
+def test_plan_matches_condense_instances() -> None:
+    person = models.PersonFactory().build()
+    kwargs = {
+        **person.dict(exclude={"hair"}),
+        **person.hair.dict(exclude={"color"}),
+        **person.hair.color.dict(exclude={"alpha"}),
+        **person.hair.color.alpha.dict(),
+    }
+
+    def get_person(person: models.Person) -> models.Person:
+        return person
+
+    plan = make_condense_plan(get_person, include_parent_model=False)
+    assert plan.condense(kwargs) == {"person": person}
+    assert (
+        condense_instances(get_person, kwargs, include_parent_model=False) ==
+        {"person": person}
+    )
+
+
+def test_expand_param_exact_slots() -> None:
+    param = inspect.signature(get_shelter).parameters["pet"]
+    kwargs = {
+        "pet__name": "shelter",
+        "pet__pet__name": "owner",
+        "pet__pet__pet__name": "dog",
+    }
+    assert expand_param(param, kwargs) == Shelter(
+        name="shelter",
+        pet=Owner(name="owner", pet=models.Pet(name="dog")),
+    )
+    assert get_kwargs_for_param(param, kwargs) == {"name": "shelter"}
+
+
+@pytest.mark.parametrize("separator", ["__", ".", "-", "_"])
+def test_expand_param_any_separator(separator: str) -> None:
+    param = inspect.signature(get_shelter).parameters["pet"]
+    kwargs = {
+        separator.join(["pet", "name"]): "shelter",
+        separator.join(["pet", "pet", "name"]): "owner",
+        separator.join(["pet", "pet", "pet", "name"]): "dog",
+    }
+    shelter = expand_param(param, kwargs, model_separator=separator)
+    assert shelter.pet.pet.name == "dog"
+    assert shelter.pet.name == "owner"
+
+
+def test_expand_param_uses_models() -> None:
+    param = inspect.signature(get_shelter).parameters["pet"]
+    owner = Owner(name="owner", pet=models.Pet(name="dog"))
+    shelter = expand_param(param, {"pet__name": "shelter"}, models={"pet": owner})
+    assert shelter.pet == owner
+
+
+def test_expand_param_recursive() -> None:
+    class Node(BaseModel):
+        child: "Node"
+
+    Node.update_forward_refs()
+
+    def get_node(node: Node) -> Node:
+        return node
+
+    param = inspect.signature(get_node).parameters["node"]
+    with pytest.raises(RecursiveModelError):
+        expand_param(param, {})
+
+
+def test_field_index_follows_schema_cache() -> None:
+    class Box(TypedDict):
+        width: int
+
+    assert field_index("box", Box) == (("box__width", "width"),)
+    Box.__annotations__ = {"height": int}
+    assert field_index("box", Box) == (("box__height", "height"),)
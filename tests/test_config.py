@@ -0,0 +1,231 @@
+"""Tests for reading arguments from config files.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import io
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from click.testing import CliRunner
+from pydantic import BaseModel
+
+from engorgio import engorgio
+from engorgio.codegen import render_function
+from engorgio.command import make_command
+from engorgio.config import ConfigCache, config_cache
+from engorgio.stream import stream
+from tests import models
+
+HERO = {"hero": {"name": "Link", "pet": {"name": "Epona"}}}
+HERO_MODEL = models.Hero(name="Link", pet=models.Pet(name="Epona"))
+
+
+def get_hero(hero: models.Hero, greeting: str = "hi") -> models.Hero:
+    """Get a hero."""
+    return hero
+
+
+@pytest.fixture()
+def config_file(tmp_path: Path) -> Path:
+    path = tmp_path / "hero.json"
+    path.write_text(json.dumps(HERO))
+    return path
+
+
+@pytest.fixture()
+def loads(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Record each file config_cache parses."""
+    config_cache.clear()
+    loaded: List[str] = []
+    load = ConfigCache._load
+
+    def record(self: ConfigCache, path: str) -> dict:
+        loaded.append(path)
+        return load(self, path)
+
+    monkeypatch.setattr(ConfigCache, "_load", record)
+    return loaded
+
+
+def test_config_file(config_file: Path) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    assert expanded(config_file=config_file) == models.Hero(
+        name="Link",
+        pet=models.Pet(name="Epona"),
+    )
+
+
+def test_arguments_override_the_file(config_file: Path) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    hero = expanded(config_file=config_file, hero__pet__name="Navi")
+    assert hero == models.Hero(name="Link", pet=models.Pet(name="Navi"))
+
+
+def test_without_a_file() -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    assert expanded(hero__name="Link", hero__pet__name="Epona").name == "Link"
+    with pytest.raises(TypeError, match="hero__pet__name"):
+        expanded(hero__name="Link")
+
+
+def test_yaml(tmp_path: Path) -> None:
+    anyconfig = pytest.importorskip("anyconfig")
+    if "yaml" not in anyconfig.list_types():
+        pytest.skip("no yaml backend for anyconfig")
+    path = tmp_path / "hero.yaml"
+    path.write_text("hero:\n  name: Link\n  pet:\n    name: Epona\n")
+    expanded = engorgio(config_option=True)(get_hero)
+    assert expanded(config_file=str(path)).pet.name == "Epona"
+
+
+def test_toml(tmp_path: Path) -> None:
+    anyconfig = pytest.importorskip("anyconfig")
+    if "toml" not in anyconfig.list_types():
+        pytest.skip("no toml backend for anyconfig")
+    path = tmp_path / "hero.toml"
+    path.write_text('[hero]\nname = "Link"\n[hero.pet]\nname = "Epona"\n')
+    expanded = engorgio(config_option=True)(get_hero)
+    assert expanded(config_file=path).pet.name == "Epona"
+
+
+def test_without_parent_model(tmp_path: Path) -> None:
+    path = tmp_path / "person.json"
+    path.write_text(
+        json.dumps(
+            {
+                "name": "me",
+                "age": 1,
+                "hair": {
+                    "length": 1,
+                    "color": {"r": 1, "g": 2, "b": 3, "alpha": {"a": 4}},
+                },
+            },
+        ),
+    )
+
+    @engorgio(config_option=True, include_parent_model=False)
+    def get_person(person: models.Person) -> models.Person:
+        return person
+
+    assert get_person(config_file=path, g=5).hair.color.g == 5
+
+
+def test_unknown_keys(tmp_path: Path) -> None:
+    path = tmp_path / "hero.json"
+    path.write_text(json.dumps({"hero": {"name": "Link", "horse": "Epona"}}))
+    expanded = engorgio(config_option=True)(get_hero)
+    with pytest.raises(ValueError, match=r"hero\.horse"):
+        expanded(config_file=path)
+
+
+def test_parsed_once(config_file: Path, loads: List[str]) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    first = expanded(config_file=config_file)
+    second = expanded(config_file=config_file)
+    assert second == first
+    assert second is not first
+    assert expanded(config_file=config_file, greeting="hey") == first
+    assert len(loads) == 1
+
+
+def test_models_are_not_shared(config_file: Path) -> None:
+    @engorgio(config_option=True)
+    def rename(hero: models.Hero) -> str:
+        """Mydocstring."""
+        hero.name += "!"
+        return hero.name
+
+    assert [rename(config_file=config_file) for _ in range(3)] == ["Link!"] * 3
+
+
+def test_changed_file_is_parsed_again(config_file: Path, loads: List[str]) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    assert expanded(config_file=config_file).name == "Link"
+    config_file.write_text(
+        json.dumps({"hero": {"name": "Zelda", "pet": {"name": "Navi"}}}),
+    )
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert expanded(config_file=config_file).name == "Zelda"
+    assert len(loads) == 2
+
+
+def test_config_file_name_is_taken() -> None:
+    def load(config_file: str) -> str:
+        return config_file
+
+    with pytest.raises(ValueError, match="config_file"):
+        engorgio(config_option=True)(load)
+
+
+def test_exec_backend_is_not_supported() -> None:
+    with pytest.raises(ValueError, match="signature backend"):
+        engorgio(config_option=True, backend="exec")(get_hero)
+
+
+def test_command(config_file: Path) -> None:
+    seen: List[models.Hero] = []
+
+    @engorgio(config_option=True)
+    def greet(hero: models.Hero) -> None:
+        seen.append(hero)
+
+    result = CliRunner().invoke(
+        make_command(greet),
+        ["--config-file", str(config_file), "--hero--name", "Zelda"],
+    )
+    assert result.exit_code == 0, result.output
+    assert seen == [models.Hero(name="Zelda", pet=models.Pet(name="Epona"))]
+
+
+def test_batch(config_file: Path) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    records = [{"config_file": config_file}, {"config_file": config_file}]
+    assert expanded.batch(records) == [HERO_MODEL, HERO_MODEL]
+    assert records[0] == {"config_file": config_file}
+
+
+def test_stream(config_file: Path) -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    handle = io.StringIO(f"config_file,hero__name\n{config_file},Zelda\n")
+    (hero,) = stream(expanded, handle, format_="csv")
+    assert hero == models.Hero(name="Zelda", pet=models.Pet(name="Epona"))
+
+
+def test_compile_is_rejected() -> None:
+    expanded = engorgio(config_option=True)(get_hero)
+    with pytest.raises(ValueError, match="config file"):
+        render_function("get_hero", expanded, set())
+
+
+class Contact(BaseModel):
+    name: str
+    email: Optional[str] = None
+
+
+def get_contact(contact: Contact) -> Contact:
+    """Get a contact."""
+    return contact
+
+
+def test_explicit_none_overrides_the_file(tmp_path: Path) -> None:
+    path = tmp_path / "contact.json"
+    path.write_text(json.dumps({"contact": {"name": "Link", "email": "a@b.c"}}))
+    expanded = engorgio(config_option=True)(get_contact)
+    assert expanded(config_file=path).email == "a@b.c"
+    assert expanded(config_file=path, contact__email=None).email is None
+
+
+def test_typer(config_file: Path) -> None:
+    typer = pytest.importorskip("typer")
+    from typer.testing import CliRunner as TyperRunner  # noqa: PLC0415
+
+    app = typer.Typer()
+    app.command()(engorgio(typer=True, config_option=True)(get_hero))
+    result = TyperRunner().invoke(app, ["--config-file", str(config_file)])
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,99 @@
+"""Tests for the on disk expansion cache.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+import os
+
+import black
+import pytest
+from pydantic import BaseModel
+
+from engorgio import engorgio
+from engorgio.diskcache import DiskCache, cache_key, get_disk_cache
+from tests import models, requires_pydantic_v1
+
+
+@pytest.fixture()
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENGORGIO_CACHE_DIR", str(tmp_path))
+    get_disk_cache.cache_clear()
+    yield tmp_path
+    get_disk_cache.cache_clear()
+
+
+def get_person(person: models.Person) -> models.Person:
+    """Mydocstring."""
+    return person
+
+
+def fail(*args, **kwargs):
+    pytest.fail("the warm start should not format source")
+
+
+@requires_pydantic_v1
+@pytest.mark.parametrize("typer", [False, True])
+def test_exec_warm_start_skips_black(cache_dir, monkeypatch, typer) -> None:
+    cold = engorgio(backend="exec", disk_cache=True, typer=typer)(get_person)
+    assert list(cache_dir.glob("*.marshal"))
+
+    monkeypatch.setattr(black, "format_str", fail)
+    warm = engorgio(backend="exec", disk_cache=True, typer=typer)(get_person)
+    cold_params = inspect.signature(cold).parameters
+    warm_params = inspect.signature(warm).parameters
+    assert list(cold_params) == list(warm_params)
+    assert [param.annotation for param in cold_params.values()] == [
+        param.annotation for param in warm_params.values()
+    ]
+
+
+def test_signature_backend_rejects_disk_cache(cache_dir) -> None:
+    with pytest.raises(ValueError, match="disk_cache needs the exec backend"):
+        engorgio(disk_cache=True)(get_person)
+    assert list(cache_dir.glob("*.marshal")) == []
+
+
+@requires_pydantic_v1
+def test_changed_model_misses(cache_dir) -> None:
+    class Thing(BaseModel):
+        a: int
+
+    def get_thing(thing: Thing) -> Thing:
+        return thing
+
+    engorgio(backend="exec", disk_cache=True)(get_thing)
+
+    class Thing(BaseModel):  # noqa: F811
+        a: int
+        b: str = "b"
+
+    def get_thing(thing: Thing) -> Thing:  # noqa: F811
+        return thing
+
+    expanded = engorgio(backend="exec", disk_cache=True)(get_thing)
+    assert "thing__b" in inspect.signature(expanded).parameters
+    assert len(list(cache_dir.glob("*.marshal"))) == 2
+
+
+def test_corrupt_entry_is_a_miss(tmp_path) -> None:
+    cache = DiskCache(tmp_path)
+    key = cache_key("corrupt")
+    (tmp_path / f"{key}.marshal").write_bytes(b"not marshal")
+    assert cache.get(key) is None
+    cache.set(key, ("ok",))
+    assert cache.get(key) == ("ok",)
+
+
+def test_least_recently_used_eviction(tmp_path) -> None:
+    cache = DiskCache(tmp_path, max_bytes=3500)
+    for i in range(3):
+        cache.set(str(i), "x" * 1000)
+        entry = tmp_path / f"{i}.marshal"
+        os.utime(entry, (i, i))
+    cache.get("0")
+    cache.set("3", "x" * 1000)
+    assert cache.get("0") is not None
+    assert cache.get("1") is None
+    assert cache.get("3") is not None
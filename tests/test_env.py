@@ -0,0 +1,192 @@
+"""Tests for reading model fields from environment variables.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import asyncio
+import io
+import json
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from click.testing import CliRunner
+from pydantic import BaseModel
+
+from engorgio import engorgio, hooks
+from engorgio.batch import run_chunk
+from engorgio.codegen import render_function
+from engorgio.command import make_command
+from engorgio.env import env_index
+from engorgio.stream import stream
+from tests import models
+
+HERO = models.Hero(name="Link", pet=models.Pet(name="Epona"))
+
+
+def get_hero(hero: models.Hero, greeting: str = "hi") -> models.Hero:
+    """Get a hero."""
+    return hero
+
+
+@engorgio(env_prefix="APP_")
+def get_env_hero(hero: models.Hero) -> models.Hero:
+    """Get a hero from the environment."""
+    return hero
+
+
+class Contact(BaseModel):
+    name: str
+    email: Optional[str] = None
+
+
+def get_contact(contact: Contact) -> Contact:
+    """Get a contact."""
+    return contact
+
+
+@pytest.fixture()
+def environ(monkeypatch: pytest.MonkeyPatch) -> pytest.MonkeyPatch:
+    monkeypatch.setenv("APP_HERO__NAME", "Link")
+    monkeypatch.setenv("APP_HERO__PET__NAME", "Epona")
+    return monkeypatch
+
+
+def test_env_index() -> None:
+    assert env_index(get_hero, "APP_") == {
+        "APP_HERO__NAME": "hero__name",
+        "APP_HERO__PET__NAME": "hero__pet__name",
+    }
+
+    def get_person(person: models.Person) -> models.Person:
+        return person
+
+    index = env_index(get_person, "", include_parent_model=False)
+    assert index["LENGTH"] == "length"
+    assert index["A"] == "a"
+
+
+def test_env(environ: pytest.MonkeyPatch) -> None:
+    expanded = engorgio(env_prefix="APP_")(get_hero)
+    assert expanded() == models.Hero(name="Link", pet=models.Pet(name="Epona"))
+
+
+def test_arguments_override_env(environ: pytest.MonkeyPatch) -> None:
+    expanded = engorgio(env_prefix="APP_")(get_hero)
+    assert expanded(hero__name="Zelda").name == "Zelda"
+    assert expanded(hero__name="Zelda").pet.name == "Epona"
+
+
+def test_env_is_read_on_each_call(environ: pytest.MonkeyPatch) -> None:
+    expanded = engorgio(env_prefix="APP_")(get_hero)
+    assert expanded().name == "Link"
+    environ.setenv("APP_HERO__NAME", "Zelda")
+    assert expanded().name == "Zelda"
+    environ.delenv("APP_HERO__NAME")
+    with pytest.raises(TypeError, match="hero__name"):
+        expanded()
+
+
+def test_env_values_are_parsed_by_the_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PERSON__AGE", "42")
+
+    @engorgio(env_prefix="")
+    def get_person(person: models.Person) -> models.Person:
+        return person
+
+    expanded = get_person(
+        person__name="me",
+        person__hair__length=1,
+        person__hair__color__r=1,
+        person__hair__color__g=1,
+        person__hair__color__b=1,
+        person__hair__color__alpha__a=1,
+    )
+    assert expanded.age == 42  # noqa: PLR2004
+
+
+def test_env_overrides_config_file(
+    environ: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "hero.json"
+    path.write_text(json.dumps({"hero": {"name": "Zelda", "pet": {"name": "Navi"}}}))
+    expanded = engorgio(env_prefix="APP_", config_option=True)(get_hero)
+    environ.delenv("APP_HERO__PET__NAME")
+    assert expanded(config_file=path) == models.Hero(
+        name="Link",
+        pet=models.Pet(name="Navi"),
+    )
+
+
+def test_command(environ: pytest.MonkeyPatch) -> None:
+    command = make_command(engorgio(env_prefix="APP_")(get_hero))
+    assert "APP_HERO__PET__NAME" in CliRunner().invoke(command, ["--help"]).output
+    result = CliRunner().invoke(command, ["--hero--name", "Zelda"])
+    assert result.exit_code == 0, result.output
+
+
+def test_exec_backend_is_not_supported() -> None:
+    with pytest.raises(ValueError, match="signature backend"):
+        engorgio(env_prefix="APP_", backend="exec")(get_hero)
+
+
+def test_batch(environ: pytest.MonkeyPatch) -> None:
+    records = [{}, {"hero__name": "Zelda"}]
+    assert get_env_hero.batch(records) == [
+        HERO,
+        models.Hero(name="Zelda", pet=models.Pet(name="Epona")),
+    ]
+    assert records == [{}, {"hero__name": "Zelda"}]
+    assert list(get_env_hero.map([{}], construct=True)) == [HERO]
+
+
+def test_batch_with_hooks(environ: pytest.MonkeyPatch) -> None:
+    exporter = hooks.add_hook(hooks.JsonExporter())
+    try:
+        assert get_env_hero.batch([{}]) == [HERO]
+    finally:
+        hooks.remove_hook(exporter)
+
+
+def test_run_chunk(environ: pytest.MonkeyPatch) -> None:
+    assert run_chunk(__name__, "get_env_hero", [{}], construct=False) == [HERO]
+
+
+def test_amap(environ: pytest.MonkeyPatch) -> None:
+    @engorgio(env_prefix="APP_")
+    async def aget_hero(hero: models.Hero) -> models.Hero:
+        return hero
+
+    assert asyncio.run(aget_hero.amap([{}, {}])) == [HERO, HERO]
+
+
+def test_stream(environ: pytest.MonkeyPatch) -> None:
+    handle = io.StringIO('{"hero__pet__name": "Navi"}\n{}\n')
+    assert list(stream(get_env_hero, handle, format_="jsonl")) == [
+        models.Hero(name="Link", pet=models.Pet(name="Navi")),
+        HERO,
+    ]
+
+
+def test_compile_is_rejected() -> None:
+    with pytest.raises(ValueError, match="environment variables"):
+        render_function("get_env_hero", get_env_hero, set())
+
+
+def test_explicit_none_overrides_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("APP_CONTACT__EMAIL", "link@hyrule.net")
+    expanded = engorgio(env_prefix="APP_")(get_contact)
+    assert expanded(contact__name="Link").email == "link@hyrule.net"
+    assert expanded(contact__name="Link", contact__email=None).email is None
+    assert expanded.batch([{"contact__name": "Link", "contact__email": None}]) == [
+        Contact(name="Link"),
+    ]
+
+
+def test_typer_none_is_unset(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("APP_CONTACT__EMAIL", "link@hyrule.net")
+    expanded = engorgio(env_prefix="APP_", typer=True)(get_contact)
+    contact = expanded(contact__name="Link", contact__email=None)
+    assert contact.email == "link@hyrule.net"
@@ -1,5 +1,7 @@
 from engorgio.expand import make_annotation
-from tests import models
+from tests import models, requires_pydantic_v1
+
+pytestmark = requires_pydantic_v1
 
 
 def test_make_annotation_person_name():
@@ -0,0 +1,187 @@
+"""Tests for flattening model instances and writing them out.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import dataclasses
+import io
+import json
+from typing import Iterator
+
+import attr
+import pytest
+from typing_extensions import TypedDict
+
+from engorgio import engorgio, flatten
+from engorgio.flat import flattener
+from engorgio.stream import read_records, stream, write_records
+from tests import models
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int = 0
+
+
+@dataclasses.dataclass
+class Line:
+    start: Point
+    end: Point
+
+
+class Box(TypedDict):
+    width: int
+    height: int
+
+
+@attr.define
+class Pen:
+    color: str
+    _width: int = 1
+
+
+@attr.define
+class Sketch:
+    _pen: Pen
+    title: str = ""
+
+
+@engorgio()
+def get_hero(hero: models.Hero) -> models.Hero:
+    """Mydocstring."""
+    return hero
+
+
+@engorgio()
+def get_sketch(sketch: Sketch) -> Sketch:
+    """Mydocstring."""
+    return sketch
+
+
+@pytest.fixture()
+def person() -> models.Person:
+    """Build a person with every field set."""
+    return models.PersonFactory.build()
+
+
+def test_flatten_person(person: models.Person) -> None:
+    flat = flatten(person, prefix="person")
+    assert flat["person__name"] == person.name
+    assert flat["person__hair__color__r"] == person.hair.color.r
+    assert flat["person__hair__color__alpha__a"] == person.hair.color.alpha.a
+    assert list(flat) == [
+        "person__name",
+        "person__alias",
+        "person__age",
+        "person__email",
+        "person__pet",
+        "person__address",
+        "person__hair__length",
+        "person__hair__color__r",
+        "person__hair__color__g",
+        "person__hair__color__b",
+        "person__hair__color__alpha__a",
+    ]
+
+
+def test_flatten_without_prefix(person: models.Person) -> None:
+    flat = flatten(person, ".")
+    assert flat["hair.length"] == person.hair.length
+    assert "person.name" not in flat
+
+
+def test_flatten_round_trips() -> None:
+    hero = models.HeroFactory.build()
+    assert get_hero(**flatten(hero, prefix="hero")) == hero
+
+
+def test_flatten_batch_is_lazy() -> None:
+    seen = []
+
+    def heroes() -> Iterator[models.Hero]:
+        for index in range(3):
+            seen.append(index)
+            yield models.Hero(name=str(index), pet=models.Pet(name="Epona"))
+
+    rows = flatten(heroes(), prefix="hero")
+    assert seen == []
+    assert next(rows) == {"hero__name": "0", "hero__pet__name": "Epona"}
+    assert seen == [0]
+    assert [row["hero__name"] for row in rows] == ["1", "2"]
+
+
+def test_flatten_mixed_batch(person: models.Person) -> None:
+    hero = models.HeroFactory.build()
+    rows = list(flatten([hero, person, hero]))
+    assert rows[0] == rows[2] == {"name": hero.name, "pet__name": hero.pet.name}
+    assert rows[1]["hair__color__b"] == person.hair.color.b
+
+
+def test_flatten_dataclass() -> None:
+    line = Line(start=Point(1, 2), end=Point(3))
+    assert flatten(line) == {"start__x": 1, "start__y": 2, "end__x": 3, "end__y": 0}
+
+
+def test_flatten_typeddict() -> None:
+    box: Box = {"width": 1, "height": 2}
+    assert flatten(box, model=Box, prefix="box") == {"box__width": 1, "box__height": 2}
+    assert list(flatten([box, box], model=Box)) == [box, box]
+
+
+def test_flatten_attrs() -> None:
+    sketch = Sketch(pen=Pen(color="red", width=3), title="cat")
+    flat = flatten(sketch, prefix="sketch")
+    assert flat == {
+        "sketch__title": "cat",
+        "sketch__pen__color": "red",
+        "sketch__pen__width": 3,
+    }
+    assert get_sketch(**flat) == sketch
+    assert flatten(Pen(color="red")) == {"color": "red", "width": 1}
+
+
+def test_flatten_not_a_model() -> None:
+    with pytest.raises(TypeError, match="not a model"):
+        list(flatten([1, 2]))
+
+
+def test_flattener_is_cached() -> None:
+    names, getter = flattener(models.Hero, "__", "hero")
+    assert flattener(models.Hero, "__", "hero")[1] is getter
+    assert names == ("hero__name", "hero__pet__name")
+
+
+def test_write_jsonl(person: models.Person) -> None:
+    handle = io.StringIO()
+    assert write_records(flatten([person, person]), handle, "jsonl") == 2
+    lines = handle.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [flatten(person)] * 2
+
+
+def test_write_csv_round_trips(tmp_path) -> None:
+    heroes = models.HeroFactory.batch(5)
+    path = tmp_path / "heroes.csv"
+    assert write_records(flatten(heroes, prefix="hero"), path) == 5
+    assert list(stream(get_hero, path)) == heroes
+
+
+def test_write_csv_none_is_empty() -> None:
+    person = models.Person(
+        name="Link",
+        age=17,
+        hair={"length": 1, "color": {"r": 1, "g": 2, "b": 3, "alpha": {"a": 4}}},
+    )
+    handle = io.StringIO()
+    write_records([flatten(person)], handle, "csv")
+    handle.seek(0)
+    (record,) = read_records(handle, "csv")
+    assert "alias" not in record
+    assert record["name"] == "Link"
+
+
+def test_write_nothing() -> None:
+    handle = io.StringIO()
+    assert write_records(iter(()), handle, "csv") == 0
+    assert handle.getvalue() == ""
@@ -0,0 +1,112 @@
+"""Tests for timing events.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import asyncio
+import io
+import json
+
+import pytest
+
+from engorgio import engorgio, hooks
+from tests import models, requires_pydantic_v1
+
+
+def get_hero(hero: models.Hero) -> models.Hero:
+    """Mydocstring."""
+    return hero
+
+
+@pytest.fixture()
+def exporter():
+    exporter = hooks.add_hook(hooks.JsonExporter())
+    yield exporter
+    hooks.remove_hook(exporter)
+
+
+def stages(exporter):
+    return [event.stage for event in exporter.events]
+
+
+def test_decoration_stages(exporter) -> None:
+    engorgio()(get_hero)
+    assert stages(exporter) == ["flatten", "annotate", "compile"]
+    assert {event.function for event in exporter.events} == {
+        "tests.test_hooks.get_hero",
+    }
+
+
+@requires_pydantic_v1
+def test_exec_decoration_stages(exporter) -> None:
+    engorgio(backend="exec")(get_hero)
+    assert stages(exporter) == ["flatten", "annotate", "codegen", "compile"]
+
+
+def test_call_stages(exporter) -> None:
+    expanded = engorgio()(get_hero)
+    exporter.clear()
+    expanded(hero__name="Link", hero__pet__name="Epona")
+    assert stages(exporter) == ["condense", "construct", "call"]
+    assert all(event.duration_ns >= 0 for event in exporter.events)
+
+
+def test_call_stage_on_error(exporter) -> None:
+    def fail(hero: models.Hero) -> None:
+        raise RuntimeError(hero.name)
+
+    expanded = engorgio()(fail)
+    exporter.clear()
+    with pytest.raises(RuntimeError):
+        expanded(hero__name="Link", hero__pet__name="Epona")
+    assert stages(exporter) == ["condense", "construct", "call"]
+
+
+def test_batch_and_amap_stages(exporter) -> None:
+    async def aget_hero(hero: models.Hero) -> models.Hero:
+        return hero
+
+    records = [{"hero__name": "Link", "hero__pet__name": "Epona"}] * 2
+    expanded = engorgio()(get_hero)
+    aexpanded = engorgio()(aget_hero)
+    exporter.clear()
+    expanded.batch(records)
+    asyncio.run(aexpanded.amap(records))
+    assert stages(exporter) == ["condense", "construct", "call"] * 4
+
+
+def test_no_events_without_hooks() -> None:
+    expanded = engorgio()(get_hero)
+    assert hooks.HOOKS == []
+    assert expanded(hero__name="Link", hero__pet__name="Epona").name == "Link"
+
+
+def test_aggregator() -> None:
+    aggregator = hooks.add_hook(hooks.Aggregator(maxlen=3))
+    try:
+        expanded = engorgio()(get_hero)
+        for _ in range(5):
+            expanded(hero__name="Link", hero__pet__name="Epona")
+    finally:
+        hooks.remove_hook(aggregator)
+    report = aggregator.report()["tests.test_hooks.get_hero"]
+    assert set(report) == {"flatten", "annotate", "compile", "condense", "construct", "call"}
+    assert report["call"]["count"] == 3
+    assert report["call"]["p50_ns"] <= report["call"]["p99_ns"]
+
+
+def test_percentile() -> None:
+    ordered = list(range(1, 101))
+    assert hooks.percentile(ordered, 0.5) == 50
+    assert hooks.percentile(ordered, 0.99) == 99
+    assert hooks.percentile([7], 0.99) == 7
+
+
+def test_json_exporter(exporter) -> None:
+    engorgio()(get_hero)(hero__name="Link", hero__pet__name="Epona")
+    fp = io.StringIO()
+    exporter.dump(fp)
+    events = json.loads(fp.getvalue())
+    assert [event["stage"] for event in events][-3:] == ["condense", "construct", "call"]
+    assert set(events[0]) == {"function", "stage", "start_ns", "duration_ns"}
@@ -0,0 +1,51 @@
+"""Importing engorgio stays cheap.
+
+Black, typer, rich, and pydantic are only imported on the code paths that
+need them.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_BUDGET_US = 150_000
+HEAVY_MODULES = ["black", "typer", "rich", "click", "pydantic", "pyflyby", "asyncio"]
+
+
+def import_time_us() -> int:
+    """Cumulative microseconds to import engorgio, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import engorgio"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "engorgio":
+            return int(cumulative)
+    pytest.fail("engorgio missing from -X importtime output")
+    return 0
+
+
+def test_import_time_budget() -> None:
+    assert min(import_time_us() for _ in range(3)) < IMPORT_BUDGET_US
+
+
+def test_no_heavy_imports() -> None:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, engorgio; print(' '.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(result.stdout.split())
+    assert [module for module in HEAVY_MODULES if module in modules] == []
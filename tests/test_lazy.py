@@ -0,0 +1,74 @@
+"""Lazy expansion waits until the function is used.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from engorgio import decorator, engorgio
+from tests import models
+
+
+@pytest.fixture()
+def expansions(monkeypatch):
+    calls = []
+    make_expanded_function = decorator.make_expanded_function
+
+    def counted(**kwargs):
+        calls.append(kwargs["func"].__name__)
+        return make_expanded_function(**kwargs)
+
+    monkeypatch.setattr(decorator, "make_expanded_function", counted)
+    return calls
+
+
+def test_lazy_defers_expansion(expansions) -> None:
+    @engorgio(lazy=True)
+    def get_hero(hero: models.Hero) -> models.Hero:
+        """Mydocstring."""
+        return hero
+
+    assert expansions == []
+    assert get_hero.__name__ == "get_hero"
+    assert get_hero.__doc__ == "Mydocstring."
+    assert expansions == []
+
+    hero = models.HeroFactory().build()
+    assert get_hero(hero__name=hero.name, hero__pet__name=hero.pet.name) == hero
+    assert get_hero(hero__name=hero.name, hero__pet__name=hero.pet.name) == hero
+    assert expansions == ["get_hero"]
+
+
+def test_lazy_signature(expansions) -> None:
+    @engorgio(lazy=True)
+    def get_hero(hero: models.Hero) -> models.Hero:
+        """Mydocstring."""
+        return hero
+
+    params = inspect.signature(get_hero).parameters
+    assert "hero__name" in params
+    assert "hero__pet__name" in params
+    assert expansions == ["get_hero"]
+
+
+def test_lazy_typer() -> None:
+    app = typer.Typer()
+
+    @app.command()
+    @engorgio(typer=True, lazy=True)
+    def get_hero(hero: models.Hero) -> None:
+        """Get a hero."""
+        print(hero)  # noqa: T201
+
+    result = CliRunner().invoke(
+        app,
+        ["--hero--name", "Link", "--hero--pet--name", "Epona"],
+    )
+    assert result.exit_code == 0
+    assert "name='Link'" in result.output
+    assert "name='Epona'" in result.output
@@ -0,0 +1,64 @@
+"""Decorated functions are collectable and share their generated code.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import gc
+import weakref
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from engorgio import engorgio, expand
+from tests import models, requires_pydantic_v1
+
+BACKENDS = [
+    pytest.param({}, id="signature"),
+    pytest.param({"typer": True}, id="signature-typer"),
+    pytest.param({"lazy": True}, id="lazy"),
+    pytest.param({"config_option": True, "env_prefix": "APP_"}, id="sources"),
+    pytest.param({"backend": "exec"}, id="exec", marks=requires_pydantic_v1),
+]
+FUNCTIONS = 50
+
+
+def make_handler(index: int) -> Callable:
+    """Create a new function each time, as a plugin host would."""
+
+    def handler(hero: models.Hero, count: int = index) -> models.Hero:
+        """Handle a hero."""
+        return hero
+
+    return handler
+
+
+@pytest.mark.parametrize("options", BACKENDS)
+def test_expanded_functions_are_collectable(options: Dict[str, Any]) -> None:
+    refs: List[weakref.ref] = []
+    for index in range(FUNCTIONS):
+        handler = make_handler(index)
+        expanded = engorgio(**options)(handler)
+        assert expanded(hero__name="Link", hero__pet__name="Epona").name == "Link"
+        refs.extend([weakref.ref(handler), weakref.ref(expanded)])
+    del handler, expanded
+    gc.collect()
+    assert [ref for ref in refs if ref() is not None] == []
+
+
+@requires_pydantic_v1
+def test_exec_backend_keeps_module_globals_clean() -> None:
+    before = set(vars(expand))
+
+    def leaky_handler(hero: models.Hero) -> models.Hero:
+        return hero
+
+    engorgio(backend="exec")(leaky_handler)
+    assert set(vars(expand)) == before
+
+
+def test_identical_signatures_share_code() -> None:
+    first = engorgio()(make_handler(1))
+    second = engorgio()(make_handler(2))
+    assert first is not second
+    assert first.__code__ is second.__code__
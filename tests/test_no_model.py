@@ -7,8 +7,12 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 SPDX-License-Identifier: MIT
 """
 import inspect
+from typing import Tuple
+
+import pytest
 
 from engorgio import engorgio
+from tests import models
 
 
 def test_no_pydantic_arg_none() -> None:
@@ -21,7 +25,7 @@ def test_no_pydantic_arg_none() -> None:
     assert "alpha" in params
     param = params["alpha"]
     assert param.annotation is inspect.Parameter.empty
-    assert param.default == str(inspect.Parameter.empty)
+    assert param.default is inspect.Parameter.empty
 
 
 def test_no_pydantic_kwarg_none() -> None:
@@ -47,7 +51,7 @@ def test_no_pydantic_arg_str_none() -> None:
     assert "alpha" in params
     param = params["alpha"]
     assert param.annotation == str
-    assert param.default == str(inspect.Parameter.empty)
+    assert param.default is inspect.Parameter.empty
 
 
 def test_no_pydantic_kwarg_str_none() -> None:
@@ -74,3 +78,16 @@ def test_no_pydantic_kwarg_str_default() -> None:
     param = params["alpha"]
     assert param.annotation == str
     assert param.default == "hello"
+
+
+def test_required_arg_next_to_a_model() -> None:
+    @engorgio()
+    def get_alpha(x: int, alpha: models.Alpha) -> Tuple[int, models.Alpha]:
+        """Mydocstring."""
+        return x, alpha
+
+    param = inspect.signature(get_alpha).parameters["x"]
+    assert param.default is inspect.Parameter.empty
+    assert get_alpha(x=1, alpha__a=2) == (1, models.Alpha(a=2))
+    with pytest.raises(TypeError, match="x"):
+        get_alpha(alpha__a=2)
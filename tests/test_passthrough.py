@@ -0,0 +1,144 @@
+"""Tests for passing ready made models to expanded functions.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+from typing import Optional
+
+import pytest
+from click.testing import CliRunner
+
+from engorgio import engorgio
+from engorgio.command import make_command
+from engorgio.expand import make_signature_function
+from tests import models
+
+
+class SuperHero(models.Hero):
+    power: str = "flight"
+
+
+@engorgio()
+def get_hero(hero: models.Hero, greeting: str = "hi") -> models.Hero:  # noqa: ARG001
+    """Mydocstring."""
+    return hero
+
+
+@engorgio()
+def get_maybe_hero(hero: Optional[models.Hero]) -> Optional[models.Hero]:
+    """Mydocstring."""
+    return hero
+
+
+def test_instance_is_passed_through() -> None:
+    hero = models.HeroFactory().build()
+    assert get_hero(hero=hero) is hero
+
+
+def test_instance_skips_the_flat_kwargs() -> None:
+    hero = models.HeroFactory().build()
+    plan = get_hero.__engorgio__.plan
+    kwargs = {"hero": hero, "hero__name": "Zelda", "greeting": "yo"}
+    assert plan.condense(kwargs) == {"hero": hero, "greeting": "yo"}
+
+    forward = make_signature_function(
+        get_hero.__engorgio__.func,
+        lambda **kwargs: kwargs,
+    )
+    assert forward(hero=hero) == {"hero": hero, "greeting": "hi"}
+    assert "hero__name" in forward(hero__name="Link")
+
+
+def test_subclass_is_passed_through() -> None:
+    hero = SuperHero(name="Clark", pet={"name": "Krypto"})
+    assert get_hero(hero=hero) is hero
+
+
+def test_flat_fields_still_work() -> None:
+    assert get_hero("Link", "Epona") == models.Hero(
+        name="Link",
+        pet=models.Pet(name="Epona"),
+    )
+
+
+def test_signature_is_unchanged() -> None:
+    assert list(inspect.signature(get_hero).parameters) == [
+        "hero__name",
+        "hero__pet__name",
+        "greeting",
+    ]
+
+
+def test_missing_fields() -> None:
+    with pytest.raises(TypeError, match="hero__pet__name"):
+        get_hero(hero__name="Link")
+
+
+def test_wrong_type() -> None:
+    with pytest.raises(TypeError, match="must be a Hero"):
+        get_hero(hero={"name": "Link", "pet": {"name": "Epona"}})
+
+
+def test_optional_model() -> None:
+    hero = models.HeroFactory().build()
+    assert get_maybe_hero(hero=hero) is hero
+    assert get_maybe_hero(hero=None) is None
+    assert get_maybe_hero(hero__name=hero.name, hero__pet__name=hero.pet.name) == hero
+
+
+def test_batch_passes_instances_through() -> None:
+    hero = models.HeroFactory().build()
+    assert get_hero.batch([{"hero": hero}]) == [hero]
+
+
+def test_lazy_passes_instances_through() -> None:
+    hero = models.HeroFactory().build()
+    lazy = engorgio(lazy=True)(get_hero.__engorgio__.func)
+    assert lazy(hero=hero) is hero
+
+
+def get_alpha(alpha: Optional[models.Alpha] = None) -> Optional[models.Alpha]:
+    """Mydocstring."""
+    return alpha
+
+
+def test_optional_model_defaults_to_none() -> None:
+    expanded = engorgio()(get_alpha)
+    (param,) = inspect.signature(expanded).parameters.values()
+    assert param.name == "alpha__a"
+    assert param.default is None
+    assert expanded() is None
+    assert expanded(alpha__a=None) is None
+    assert expanded(alpha__a=1) == models.Alpha(a=1)
+    assert expanded(alpha=None) is None
+    assert expanded.batch([{}, {"alpha__a": 2}]) == [None, models.Alpha(a=2)]
+
+
+def test_optional_model_nested() -> None:
+    @engorgio()
+    def get_hair(hair: Optional[models.Hair] = None) -> Optional[models.Hair]:
+        """Mydocstring."""
+        return hair
+
+    assert get_hair() is None
+    with pytest.raises(ValueError, match=r"(?i)field required"):
+        get_hair(hair__color__r=1)
+
+
+def test_optional_model_is_not_required_by_typer() -> None:
+    expanded = engorgio(typer=True)(get_alpha)
+    option = inspect.signature(expanded).parameters["alpha__a"].default
+    assert option.default is None
+    assert not option.prompt
+    assert expanded(alpha__a=None) is None
+
+
+def test_optional_model_is_not_required_by_click() -> None:
+    command = make_command(get_alpha)
+    result = CliRunner().invoke(command, [], standalone_mode=False)
+    assert result.exception is None
+    assert result.return_value is None
+    result = CliRunner().invoke(command, ["--alpha--a", "3"], standalone_mode=False)
+    assert result.return_value == models.Alpha(a=3)
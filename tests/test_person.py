@@ -5,6 +5,7 @@ SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
 SPDX-License-Identifier: MIT
 """
 
+import dataclasses
 import inspect
 
 import pytest
@@ -267,33 +268,33 @@ def test_mydate_instance(date: models.MyDate) -> None:
     assert get_mydate(**date.dict()) == date
 
 
-# def test_persondataclass() -> None:
-#     @engorgio()
-#     def get_persondataclass(person: models.PersonDataclass) -> None:
-#         """Mydocstring."""
-#         return person
-
-#     sig = inspect.signature(get_persondataclass)
-#     params = sig.parameters
-#     assert "name" in params
-#     assert "alias" in params
-#     assert "age" in params
-#     assert "email" in params
-#     assert "pet" in params
-#     assert "address" in params
-
-#     person = models.PersonDataclassFactory().build()
-#     assert get_persondataclass(**person.dict()) == person
-
-
-# @pytest.mark.parametrize(
-#     "person",
-#     models.PersonDataclassFactory().batch(size=5),
-# )
-# def test_persondataclass_instance(person: models.PersonDataclass) -> None:
-#     @engorgio()
-#     def get_persondataclass(person: models.PersonDataclass) -> None:
-#         """Mydocstring."""
-#         return person
-
-#     assert get_persondataclass(**person.dict()) == person
+def test_persondataclass() -> None:
+    @engorgio(include_parent_model=False)
+    def get_persondataclass(person: models.PersonDataclass) -> None:
+        """Mydocstring."""
+        return person
+
+    sig = inspect.signature(get_persondataclass)
+    params = sig.parameters
+    assert "name" in params
+    assert "alias" in params
+    assert "age" in params
+    assert "email" in params
+    assert "pet" in params
+    assert "address" in params
+
+    person = models.PersonDataclassFactory().build()
+    assert get_persondataclass(**dataclasses.asdict(person)) == person
+
+
+@pytest.mark.parametrize(
+    "person",
+    models.PersonDataclassFactory().batch(size=5),
+)
+def test_persondataclass_instance(person: models.PersonDataclass) -> None:
+    @engorgio(include_parent_model=False)
+    def get_persondataclass(person: models.PersonDataclass) -> None:
+        """Mydocstring."""
+        return person
+
+    assert get_persondataclass(**dataclasses.asdict(person)) == person
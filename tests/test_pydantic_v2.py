@@ -0,0 +1,135 @@
+"""Tests for pydantic v2 models, skipped when pydantic v1 is installed.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+from typing import List, Optional
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+pydantic = pytest.importorskip("pydantic", minversion="2")
+
+from pydantic import BaseModel, Field, ValidationError  # noqa: E402
+
+from engorgio import engorgio  # noqa: E402
+from engorgio.adapters import MISSING, PydanticV2Adapter, get_adapter  # noqa: E402
+
+
+class Color(BaseModel):
+    r: int
+    g: int = Field(0, description="green")
+
+
+class Hair(BaseModel):
+    color: Color
+    length: int
+
+
+class Person(BaseModel):
+    name: str
+    alias: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    hair: Hair
+
+
+def get_person(person: Person) -> Person:
+    """Get a person."""
+    return person
+
+
+def test_adapter() -> None:
+    assert isinstance(get_adapter(Person), PydanticV2Adapter)
+
+
+def test_signature() -> None:
+    params = inspect.signature(engorgio()(get_person)).parameters
+    assert list(params) == [
+        "person__name",
+        "person__hair__length",
+        "person__hair__color__r",
+        "person__alias",
+        "person__tags",
+        "person__hair__color__g",
+    ]
+    assert params["person__alias"].default is None
+    assert params["person__tags"].default is MISSING
+    assert params["person__hair__color__g"].default == 0
+
+
+class Weights(BaseModel):
+    model_config = pydantic.ConfigDict(strict=True)
+
+    weights: List[float] = [1.0, 2.0]
+    retries: int = 3
+    debug: bool = False
+
+
+def get_weights(weights: Weights) -> Weights:
+    """Get weights."""
+    return weights
+
+
+@pytest.mark.parametrize("validate", ["full", "none"])
+def test_real_defaults(validate: str) -> None:
+    expanded = engorgio(validate=validate)(get_weights)
+    weights = expanded()
+    assert weights == Weights()
+    assert weights.weights is not expanded().weights
+    assert expanded(weights__retries=5).retries == 5
+    params = inspect.signature(expanded).parameters
+    assert params["weights__retries"].default == 3
+    assert params["weights__weights"].default is MISSING
+
+
+@pytest.mark.parametrize("validate", ["full", "outer", "none"])
+def test_call(validate: str) -> None:
+    expanded = engorgio(validate=validate)(get_person)
+    person = expanded(
+        person__name="me",
+        person__hair__color__r=1,
+        person__hair__color__g=2,
+        person__hair__length=3,
+    )
+    assert person == Person(name="me", hair={"color": {"r": 1, "g": 2}, "length": 3})
+    assert isinstance(person.hair.color, Color)
+
+
+def test_validates_nested_in_one_pass() -> None:
+    expanded = engorgio()(get_person)
+    with pytest.raises(ValidationError) as error:
+        expanded(
+            person__name="me",
+            person__hair__color__r="red",
+            person__hair__length="long",
+        )
+    assert {e["loc"] for e in error.value.errors()} == {
+        ("hair", "color", "r"),
+        ("hair", "length"),
+    }
+
+
+def test_trusted() -> None:
+    expanded = engorgio(trusted=True)(get_person)
+    person = expanded(
+        person__name="me",
+        person__hair__color__r="red",
+        person__hair__length=3,
+    )
+    assert person.hair.color.r == "red"
+
+
+def test_passthrough() -> None:
+    person = Person(name="me", hair={"color": {"r": 1}, "length": 3})
+    assert engorgio()(get_person)(person=person) is person
+
+
+def test_typer_help() -> None:
+    app = typer.Typer()
+    app.command()(engorgio(typer=True)(get_person))
+    result = CliRunner().invoke(app, ["--help"])
+    assert result.exit_code == 0
+    assert "green" in result.output
@@ -0,0 +1,121 @@
+"""Tests for the model schema cache.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+
+import pytest
+from pydantic import BaseModel
+
+from engorgio.schema import ModelSchemaCache, RecursiveModelError, flatten_model
+from tests import models
+
+
+def test_person_fields() -> None:
+    schema = ModelSchemaCache().get(models.Person)
+    assert [field.name for field in schema.fields] == [
+        "name",
+        "alias",
+        "age",
+        "email",
+        "pet",
+        "address",
+        "hair__length",
+        "hair__color__r",
+        "hair__color__g",
+        "hair__color__b",
+        "hair__color__alpha__a",
+    ]
+    assert [path for path, _ in schema.models] == [
+        ("hair", "color", "alpha"),
+        ("hair", "color"),
+        ("hair",),
+        (),
+    ]
+
+
+def test_person_field_details() -> None:
+    fields = {field.name: field for field in ModelSchemaCache().get(models.Person).fields}
+    assert fields["pet"].default == "dog"
+    assert fields["alias"].default is None
+    assert fields["name"].default is inspect.Parameter.empty
+    assert fields["name"].description == "The name of the person."
+    assert fields["hair__color__alpha__a"].panel == "hair--color--alpha"
+    assert fields["name"].panel == ""
+
+
+def test_separator() -> None:
+    schema = ModelSchemaCache().get(models.Hero, "_____")
+    assert [field.name for field in schema.fields] == ["name", "pet_____name"]
+
+
+def test_cache_reuses_schema() -> None:
+    cache = ModelSchemaCache()
+    schema = cache.get(models.Person)
+    assert cache.get(models.Person) is schema
+    assert cache.get(models.Hair) is not None
+    assert len(cache) == 2
+
+
+def test_redefined_model() -> None:
+    cache = ModelSchemaCache()
+
+    class Thing(BaseModel):
+        a: int
+
+    first = cache.get(Thing)
+
+    class Thing(BaseModel):  # noqa: F811
+        b: int
+
+    second = cache.get(Thing)
+    assert first is not second
+    assert [field.name for field in second.fields] == ["b"]
+
+
+def test_cache_is_bounded() -> None:
+    cache = ModelSchemaCache(maxsize=2)
+    person = cache.get(models.Person)
+    cache.get(models.Hair)
+    cache.get(models.Color)
+    assert len(cache) == 2
+    assert cache.get(models.Person) is not person
+
+
+class Node(BaseModel):
+    name: str
+    child: "Node"
+
+
+class Left(BaseModel):
+    right: "Right"
+
+
+class Right(BaseModel):
+    left: Left
+
+
+Node.update_forward_refs()
+Left.update_forward_refs()
+
+
+def test_self_referencing_model() -> None:
+    with pytest.raises(RecursiveModelError, match="Node -> Node is recursive"):
+        flatten_model(Node)
+
+
+def test_mutually_recursive_models() -> None:
+    with pytest.raises(RecursiveModelError, match="Left -> Right -> Left"):
+        flatten_model(Left)
+
+
+def test_shared_model_is_not_recursive() -> None:
+    class Twins(BaseModel):
+        first: models.Hair
+        second: models.Hair
+
+    names = [field.name for field in flatten_model(Twins).fields]
+    assert "first__color__alpha__a" in names
+    assert "second__color__alpha__a" in names
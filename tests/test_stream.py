@@ -0,0 +1,132 @@
+"""Tests for streaming records from files.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import io
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from engorgio import engorgio
+from engorgio.stream import read_records, stream
+from tests import models
+
+
+@engorgio()
+def get_hero(hero: models.Hero, greeting: str = "hi") -> str:
+    """Mydocstring."""
+    return f"{greeting} {hero.name} and {hero.pet.name}"
+
+
+CSV = """hero__name,hero__pet__name,greeting,unused
+Link,Epona,yo,x
+Zelda,,hey,x
+Mario,Yoshi,,x
+"""
+
+
+def test_read_csv_drops_empty_and_unknown(tmp_path) -> None:
+    path = tmp_path / "heroes.csv"
+    path.write_text(CSV)
+    records = list(read_records(path, names={"hero__name", "hero__pet__name"}))
+    assert records == [
+        {"hero__name": "Link", "hero__pet__name": "Epona"},
+        {"hero__name": "Zelda"},
+        {"hero__name": "Mario", "hero__pet__name": "Yoshi"},
+    ]
+
+
+def test_stream_csv_collect(tmp_path) -> None:
+    path = tmp_path / "heroes.csv"
+    path.write_text(CSV)
+    records = stream(get_hero, path, errors="collect")
+    assert list(records) == ["yo Link and Epona", "hi Mario and Yoshi"]
+    assert [error.row for error in records.errors] == [2]
+    assert isinstance(records.errors[0].error, ValidationError)
+
+
+def test_stream_csv_raise(tmp_path) -> None:
+    path = tmp_path / "heroes.csv"
+    path.write_text(CSV)
+    results = iter(stream(get_hero, path))
+    assert next(results) == "yo Link and Epona"
+    with pytest.raises(ValidationError):
+        next(results)
+
+
+def test_stream_csv_skip(tmp_path) -> None:
+    path = tmp_path / "heroes.csv"
+    path.write_text(CSV)
+    records = stream(get_hero, path, errors="skip")
+    assert len(list(records)) == 2
+    assert records.errors == []
+
+
+def test_stream_jsonl_progress(tmp_path) -> None:
+    path = tmp_path / "heroes.ndjson"
+    lines = [
+        json.dumps({"hero__name": f"hero {i}", "hero__pet__name": f"pet {i}"})
+        for i in range(5)
+    ]
+    path.write_text("\n".join(lines) + "\n\n")
+    progress = []
+    results = list(stream(get_hero, path, chunksize=2, progress=progress.append))
+    assert results[-1] == "hi hero 4 and pet 4"
+    assert progress == [2, 4, 5]
+
+
+def test_stream_stdin(monkeypatch) -> None:
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO('{"hero__name": "Link", "hero__pet__name": "Epona"}\n'),
+    )
+    assert list(stream(get_hero, "-", format_="jsonl")) == ["hi Link and Epona"]
+
+
+def test_unknown_format(tmp_path) -> None:
+    with pytest.raises(ValueError, match="cannot tell the format"):
+        stream(get_hero, tmp_path / "heroes.txt")
+
+
+def test_json_array_is_rejected(tmp_path) -> None:
+    path = tmp_path / "heroes.json"
+    path.write_text(json.dumps([{"hero__name": "Link", "hero__pet__name": "Epona"}]))
+    with pytest.raises(ValueError, match="json lines"):
+        stream(get_hero, path)
+
+
+BAD_JSONL = """{"hero__name": "Link", "hero__pet__name": "Epona"}
+{"hero__name": "Zelda",
+["Mario"]
+{"hero__name": "Mario", "hero__pet__name": "Yoshi"}
+"""
+
+
+@pytest.mark.parametrize("errors", ["skip", "collect"])
+def test_stream_bad_jsonl_lines(errors: str) -> None:
+    records = stream(get_hero, io.StringIO(BAD_JSONL), format_="jsonl", errors=errors)
+    assert list(records) == ["hi Link and Epona", "hi Mario and Yoshi"]
+    if errors == "collect":
+        assert [error.row for error in records.errors] == [2, 3]
+        assert records.errors[0].record == '{"hero__name": "Zelda",\n'
+        assert all(isinstance(error.error, ValueError) for error in records.errors)
+
+
+def test_stream_bad_jsonl_raise() -> None:
+    results = iter(stream(get_hero, io.StringIO(BAD_JSONL), format_="jsonl"))
+    assert next(results) == "hi Link and Epona"
+    with pytest.raises(json.JSONDecodeError):
+        next(results)
+
+
+def test_stream_short_csv_row() -> None:
+    source = io.StringIO("hero__name,hero__pet__name\nLink\nMario,Yoshi\n")
+    records = stream(get_hero, source, format_="csv", errors="collect")
+    assert list(records) == ["hi Mario and Yoshi"]
+    assert records.errors[0].row == 1
+    assert records.errors[0].record == ["Link"]
+    with pytest.raises(ValueError, match="1 cells"):
+        list(read_records(io.StringIO("a,b\n1\n"), "csv"))
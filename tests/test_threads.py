@@ -0,0 +1,112 @@
+"""Decorating and calling from many threads at once.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import pytest
+from pydantic import create_model
+
+from engorgio import engorgio
+from engorgio.lazy import LazyFunction
+from engorgio.schema import ModelSchemaCache
+from tests import models, requires_pydantic_v1
+
+THREADS = 16
+ROUNDS = 25
+
+
+@pytest.fixture(autouse=True)
+def switch_often() -> Iterator[None]:
+    """Switch threads as often as possible to shake out races."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def make_handler(index: int) -> Callable:
+    """Create a function that is always named handler, tagged with index."""
+
+    def handler(hero: models.Hero, tag: int = index) -> Tuple[models.Hero, int]:
+        """Handle a hero."""
+        return hero, tag
+
+    return handler
+
+
+def run_threads(work: Callable[[int], Any]) -> List[Any]:
+    """Run work for every round on a pool of THREADS threads at once."""
+    barrier = threading.Barrier(THREADS)
+
+    def start(index: int) -> Any:
+        if index < THREADS:
+            barrier.wait()
+        return work(index)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(start, range(THREADS * ROUNDS)))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        pytest.param({}, id="signature"),
+        pytest.param({"typer": True}, id="signature-typer"),
+        pytest.param({"backend": "exec"}, id="exec", marks=requires_pydantic_v1),
+    ],
+)
+def test_decorate_and_call_same_name(options: Dict[str, Any]) -> None:
+    def work(index: int) -> Tuple[int, Any]:
+        expanded = engorgio(**options)(make_handler(index))
+        return index, expanded(hero__name=str(index), hero__pet__name="Epona")
+
+    for index, (hero, tag) in run_threads(work):
+        assert hero.name == str(index)
+        if "typer" not in options:
+            assert str(tag) == str(index)
+
+
+def test_call_shared_function() -> None:
+    expanded = engorgio()(make_handler(0))
+
+    def work(index: int) -> models.Hero:
+        return expanded(hero__name=str(index), hero__pet__name=str(-index))[0]
+
+    for index, hero in enumerate(run_threads(work)):
+        assert hero == models.Hero(name=str(index), pet=models.Pet(name=str(-index)))
+
+
+def test_lazy_expands_once() -> None:
+    expansions = []
+    expand = engorgio()
+
+    def count(func: Callable) -> Callable:
+        expansions.append(func)
+        return expand(func)
+
+    handler = make_handler(0)
+    lazy = LazyFunction(handler, lambda: count(handler))
+    results = run_threads(
+        lambda index: lazy(hero__name=str(index), hero__pet__name="Epona")[0].name,
+    )
+    assert results == [str(index) for index in range(THREADS * ROUNDS)]
+    assert len(expansions) == 1
+
+
+def test_schema_cache_under_contention() -> None:
+    cache = ModelSchemaCache(maxsize=4)
+    created = [create_model(f"Model{i}", value=(int, i)) for i in range(THREADS)]
+
+    def work(index: int) -> Any:
+        model = created[index % len(created)]
+        return model, cache.get(model).model
+
+    for model, cached in run_threads(work):
+        assert cached is model
+    assert len(cache) <= cache.maxsize
@@ -0,0 +1,113 @@
+"""Tests for choosing how much engorgio validates.
+
+SPDX-FileCopyrightText: 2023-present Waylon S. Walker <waylon@waylonwalker.com>
+
+SPDX-License-Identifier: MIT
+"""
+import inspect
+from typing import List
+
+import pytest
+import typer
+from pydantic import BaseModel, Field, ValidationError
+from typer.testing import CliRunner
+
+from engorgio import engorgio
+from engorgio.adapters import MISSING
+from engorgio.codegen import render_function
+from tests import models, requires_pydantic_v1
+
+
+def get_hero(hero: models.Hero) -> models.Hero:
+    """Mydocstring."""
+    return hero
+
+
+@pytest.mark.parametrize("validate", ["full", "outer", "none"])
+def test_validate_modes_build_the_same_model(validate: str) -> None:
+    hero = models.HeroFactory().build()
+    expanded = engorgio(validate=validate)(get_hero)
+    assert expanded(hero__name=hero.name, hero__pet__name=hero.pet.name) == hero
+
+
+@pytest.mark.parametrize("validate", ["full", "outer"])
+def test_validate_nested(validate: str) -> None:
+    expanded = engorgio(validate=validate)(get_hero)
+    with pytest.raises(ValidationError):
+        expanded(hero__name="Link", hero__pet__name=["not", "a", "name"])
+
+
+def test_validate_outer_keeps_nested_models() -> None:
+    expanded = engorgio(validate="outer")(get_hero)
+    hero = expanded(hero__name="Link", hero__pet__name="Epona")
+    assert isinstance(hero.pet, models.Pet)
+
+
+@pytest.mark.parametrize(
+    "decorate",
+    [engorgio(validate="none"), engorgio(trusted=True)],
+)
+def test_trusted_skips_validation(decorate) -> None:
+    expanded = decorate(get_hero)
+    hero = expanded(hero__name="Link", hero__pet__name=["not", "a", "name"])
+    assert hero.pet.name == ["not", "a", "name"]
+    assert expanded.__engorgio__.validate == "none"
+
+
+def test_trusted_batch() -> None:
+    expanded = engorgio(trusted=True)(get_hero)
+    heroes = expanded.batch([{"hero__name": "Link", "hero__pet__name": 1}])
+    assert heroes[0].pet.name == 1
+
+
+class Cfg(BaseModel):
+    name: str
+    retries: int = 3
+    debug: bool = False
+    tags: List[str] = Field(default_factory=list)
+
+
+def run(cfg: Cfg) -> Cfg:
+    """Mydocstring."""
+    return cfg
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        pytest.param({}, id="signature"),
+        pytest.param({"backend": "exec"}, id="exec", marks=requires_pydantic_v1),
+    ],
+)
+def test_trusted_uses_model_defaults(options) -> None:
+    expanded = engorgio(trusted=True, **options)(run)
+    cfg = expanded(cfg__name="x")
+    assert cfg.retries == 3
+    assert type(cfg.retries) is int
+    assert cfg.debug is False
+    assert cfg.tags == []
+    assert expanded(cfg__name="x", cfg__retries=5).retries == 5
+    assert str(inspect.signature(expanded).parameters["cfg__retries"].default) == "3"
+
+
+def test_default_factory_is_left_to_the_model() -> None:
+    expanded = engorgio()(run)
+    assert inspect.signature(expanded).parameters["cfg__tags"].default is MISSING
+    assert expanded(cfg__name="x").tags == []
+    assert expanded(cfg__name="x", cfg__tags=["a"]).tags == ["a"]
+
+
+def test_default_factory_typer() -> None:
+    app = typer.Typer()
+    app.command()(engorgio(typer=True)(run))
+    result = CliRunner().invoke(app, ["--cfg--name", "x"])
+    assert result.exit_code == 0, result.output
+
+    source = render_function("run", engorgio(typer=True)(run), set())
+    assert "typer.Option(None" in source
+    assert "cfg__tags is None or cfg__tags is engorgio.adapters.MISSING" in source
+
+
+def test_unknown_validate() -> None:
+    with pytest.raises(ValueError, match="unknown validate"):
+        engorgio(validate="some")(get_hero)